@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+r'''
+-----------------------------------------------------------------------------------------
+    catalogue | benchmark git cat commands on a synthetic catalogue
+
+      - python3 benchmarks/catalogue.py                  :  benchmark 10 and 100 repositories
+      - python3 benchmarks/catalogue.py -n 10 100 1000   :  choose the catalogue sizes
+      - python3 benchmarks/catalogue.py --json FILE      :  also save the results as JSON
+
+    Copyright (C) Andrew Mathas
+
+    Distributed under the terms of the GNU General Public License (GPL)
+                  http://www.gnu.org/licenses/
+
+    <Andrew.Mathas@gmail.com>
+-----------------------------------------------------------------------------------------
+
+Measure how long the git cat commands take on a catalogue of N repositories.
+For each catalogue size this:
+
+    - creates a temporary home directory containing N working repositories in
+      ~/Code, whose remotes are local bare repositories that are accessed
+      using file:// URLs, so that nothing needs the network
+    - gives each repository a history of --commits commits and makes the
+      requested fractions of the repositories dirty, ahead of their remote
+      and behind their remote
+    - runs each of the commands ls, status, fetch, pull, push, commit and
+      install, where install clones the whole catalogue into an empty prefix
+
+For each command, the report gives the wall time, the number of git
+processes, which is counted using the GIT_TRACE2_EVENT log, and the peak
+resident set size of git cat and the git processes that it runs. The
+catalogue is recreated before each run, because commands like push and pull
+change it, and the median of the runs is reported.
+'''
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+GITCAT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run the git-cat entry point in the same way as the console script
+ENTRY_POINT = 'import sys; sys.argv[0] = "git-cat"; from gitcat import main; main()'
+
+COMMANDS = ['ls', 'status', 'fetch', 'pull', 'push', 'commit', 'install']
+
+
+def environment(home):
+    r'''
+    Return the environment for running git and git cat in the home directory
+    `home`, so that the results do not depend on the configuration of the user
+    '''
+    env = dict(os.environ,
+               HOME=home,
+               PYTHONPATH=GITCAT,
+               GIT_CONFIG_NOSYSTEM='1',
+               GIT_AUTHOR_NAME='Benchmark',
+               GIT_AUTHOR_EMAIL='benchmark@example.com',
+               GIT_COMMITTER_NAME='Benchmark',
+               GIT_COMMITTER_EMAIL='benchmark@example.com')
+    for var in ['XDG_CACHE_HOME', 'XDG_CONFIG_HOME', 'GIT_DIR', 'GIT_WORK_TREE',
+                'GIT_SSH', 'GIT_SSH_COMMAND', 'GIT_TRACE2_EVENT']:
+        env.pop(var, None)
+    return env
+
+
+def git(env, *args, cwd=None, stdin=None):
+    r'''
+    Run git with the arguments `args` and return its output
+    '''
+    return subprocess.run(['git', *args], cwd=cwd, env=env, input=stdin, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def history(commits):
+    r'''
+    Return a `git fast-import` stream for a master branch with `commits`
+    commits, each of which changes the file README
+    '''
+    stream = []
+    for commit in range(1, commits + 1):
+        contents = f'version {commit}\n'
+        message = f'commit {commit}\n'
+        stream.append(f'commit refs/heads/master\n'
+                      f'committer Benchmark <benchmark@example.com> {1600000000 + commit} +0000\n'
+                      f'data {len(message)}\n{message}'
+                      f'M 100644 inline README\ndata {len(contents)}\n{contents}\n')
+    return ''.join(stream)
+
+
+def make_catalogue(home, env, size, options):
+    r'''
+    Create a catalogue of `size` repositories, and their remotes, in `home`
+    and return the name of its gitcatrc file
+    '''
+    # make one bare repository, and one clone of it, and then copy them
+    template = os.path.join(home, 'template')
+    git(env, 'init', '--quiet', '--bare', template + '.git')
+    git(env, 'fast-import', '--quiet', cwd=template + '.git', stdin=history(options.commits))
+    git(env, 'clone', '--quiet', f'file://{template}.git', template)
+
+    choose = random.Random(size)
+    catalogue = []
+    for rep in range(size):
+        name = f'rep{rep:05d}'
+        remote = os.path.join(home, 'remotes', name + '.git')
+        work = os.path.join(home, 'Code', name)
+        shutil.copytree(template + '.git', remote)
+        shutil.copytree(template, work)
+        git(env, 'remote', 'set-url', 'origin', f'file://{remote}', cwd=work)
+        catalogue.append(f'Code/{name} = file://{remote}')
+
+        if choose.random() < options.behind:
+            git(env, 'reset', '--quiet', '--hard', 'HEAD~1', cwd=work)
+        if choose.random() < options.ahead:
+            with open(os.path.join(work, 'AHEAD'), 'w') as ahead:
+                ahead.write('ahead\n')
+            git(env, 'add', 'AHEAD', cwd=work)
+            git(env, 'commit', '--quiet', '--message=ahead', cwd=work)
+        if choose.random() < options.dirty:
+            with open(os.path.join(work, 'README'), 'a') as readme:
+                readme.write('dirty\n')
+
+    gitcatrc = os.path.join(home, '.gitcatrc')
+    with open(gitcatrc, 'w') as rc_file:
+        rc_file.write('Catalogue:\n' + '\n'.join(catalogue) + '\n')
+    return gitcatrc
+
+
+def run_command(home, env, command, jobs):
+    r'''
+    Run `git cat command` in `home` and return its wall time in seconds, the
+    number of git processes that it started and its peak RSS in MiB
+    '''
+    trace = os.path.join(home, 'trace2.json')
+    args = ['--jobs', str(jobs), command]
+    if command == 'install':
+        # clone the whole catalogue into an empty prefix
+        prefix = tempfile.mkdtemp(prefix='install-', dir=home)
+        args = ['--prefix', prefix] + args
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', ENTRY_POINT, *args], cwd=home,
+                               env=dict(env, GIT_TRACE2_EVENT=trace),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)  # so that Popen does not wait again
+
+    processes = 0
+    if os.path.exists(trace):
+        with open(trace, 'r') as events:
+            processes = sum(1 for event in events if '"event":"start"' in event)
+        os.remove(trace)
+
+    # ru_maxrss is in KiB on linux
+    return wall, processes, usage.ru_maxrss / 1024
+
+
+def benchmark(size, options):
+    r'''
+    Return a dictionary of the results for each command on a catalogue of
+    `size` repositories
+    '''
+    runs = {command: [] for command in options.commands}
+    for _ in range(options.runs):
+        for command in options.commands:
+            with tempfile.TemporaryDirectory(prefix='gitcat-catalogue-') as home:
+                env = environment(home)
+                make_catalogue(home, env, size, options)
+                runs[command].append(run_command(home, env, command, options.jobs))
+
+    return {
+        command: {
+            'wall time (s)': statistics.median(run[0] for run in results),
+            'git processes': statistics.median(run[1] for run in results),
+            'peak RSS (MiB)': statistics.median(run[2] for run in results),
+        }
+        for command, results in runs.items()
+    }
+
+
+def main():
+    r'''
+    Run the catalogue benchmarks and print the results
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark git cat on a synthetic catalogue')
+    parser.add_argument('-n', '--repositories', type=int, nargs='+', default=[10, 100],
+                        help='the numbers of repositories in the catalogues')
+    parser.add_argument('-c', '--commits', type=int, default=20, help='number of commits in each repository')
+    parser.add_argument('--dirty', type=float, default=0.2, help='fraction of repositories with uncommitted changes')
+    parser.add_argument('--ahead', type=float, default=0.2, help='fraction of repositories ahead of their remote')
+    parser.add_argument('--behind', type=float, default=0.2, help='fraction of repositories behind their remote')
+    parser.add_argument('-j', '--jobs', type=int, default=8, help='number of jobs for git cat')
+    parser.add_argument('-r', '--runs', type=int, default=3, help='number of runs of each benchmark')
+    parser.add_argument('--commands', nargs='+', default=COMMANDS, choices=COMMANDS,
+                        help='the git cat commands to benchmark')
+    parser.add_argument('--json', type=str, default=None, help='save the results in this file')
+    options = parser.parse_args()
+    options.commits = max(2, options.commits)  # behind needs at least two commits
+
+    results = {
+        'python': sys.version.split()[0],
+        'git': subprocess.run(['git', '--version'], capture_output=True, text=True).stdout.split()[-1],
+        'options': {key: val for key, val in vars(options).items() if key not in ('json', 'repositories')},
+        'catalogues': {},
+    }
+    for size in options.repositories:
+        results['catalogues'][size] = benchmark(size, options)
+        print(f'{size} repositories:')
+        print(f'  {"command":<10} {"wall (s)":>10} {"git procs":>10} {"RSS (MiB)":>10}')
+        for command, result in results['catalogues'][size].items():
+            print(f'  {command:<10} {result["wall time (s)"]:10.3f} '
+                  f'{result["git processes"]:10.0f} {result["peak RSS (MiB)"]:10.1f}')
+
+    if options.json is not None:
+        with open(options.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+r'''
+-----------------------------------------------------------------------------------------
+    hotpaths | benchmark the python code in git cat on very large catalogues
+
+      - python3 benchmarks/hotpaths.py              :  print a summary
+      - python3 benchmarks/hotpaths.py -n 50000     :  change the size of the catalogue
+      - python3 benchmarks/hotpaths.py --json FILE  :  also save the results as JSON
+
+    Copyright (C) Andrew Mathas
+
+    Distributed under the terms of the GNU General Public License (GPL)
+                  http://www.gnu.org/licenses/
+
+    <Andrew.Mathas@gmail.com>
+-----------------------------------------------------------------------------------------
+
+Time the parts of git cat whose cost grows with the size of the catalogue, or
+with the size of the output of git, without running git. This makes it
+possible to measure the overhead of git cat separately from the time spent
+in git. The benchmarks use a synthetic catalogue with 10,000 repositories,
+by default, and fake git output with the same number of lines:
+
+    - reading the catalogue, with and without the catalogue cache
+    - saving and listing the catalogue
+    - filtering the catalogue with a regular expression, and selecting a
+      group of repositories, with and without an exclusion
+    - moving a repository in the catalogue, as for `git cat -m`
+    - normalising the output of git, as done by `Git`
+    - parsing the output of `git status --porcelain=v2 --branch`
+    - building the command line parser for one command, and for all commands
+
+Each benchmark is repeated and the median and minimum times per call are
+reported.
+'''
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+
+GITCAT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_gitcat(gitcat, home, size):
+    r'''
+    Return a `GitCat` instance, with a catalogue of `size` repositories in
+    `home`, without running any git cat commands
+    '''
+    gitcatrc = os.path.join(home, '.gitcatrc')
+    with open(gitcatrc, 'w') as rc_file:
+        rc_file.write('jobs = 8\nCatalogue:\n')
+        for rep in range(size):
+            # every tenth repository is in the group @tenth
+            group = ' @tenth' if rep % 10 == 0 else ''
+            rc_file.write(f'Code/project{rep:05d} = git@github.com:user/project{rep:05d}.git{group}\n')
+
+    cat = gitcat.GitCat.__new__(gitcat.GitCat)
+    cat.gitcatrc = gitcatrc
+    cat.options = argparse.Namespace(catalogue=gitcatrc, prefix=home, repositories=[], exclude=[])
+    cat.prefix = home
+    cat.quiet = cat.dry_run = False
+    cat.jobs = 8
+    cat.connections = 4
+    cat.host_connections = {}
+    cat.output = 'text'
+    cat.read_catalogue()
+    return cat
+
+
+def git_output(size):
+    r'''
+    Return fake stdout and stderr from git with `size` lines each
+    '''
+    stdout = ''.join(f' M src/module{line:05d}.py\n' for line in range(size))
+    stderr = ''.join(f'remote: Counting objects: {line}%\r' for line in range(size))
+    return stdout, stderr
+
+
+def porcelain(size):
+    r'''
+    Return fake output of `git status --porcelain=v2 --branch` with `size`
+    changed files
+    '''
+    lines = ['# branch.oid 0123456789abcdef0123456789abcdef01234567',
+             '# branch.head master',
+             '# branch.upstream origin/master',
+             '# branch.ab +3 -1']
+    for line in range(size):
+        if line % 3 == 0:
+            lines.append(f'? untracked/file{line:05d}.txt')
+        else:
+            lines.append(f'1 .M N... 100644 100644 100644 {"0"*40} {"1"*40} src/module{line:05d}.py')
+    return '\n'.join(lines) + '\n'
+
+
+def benchmarks(gitcat, cat, size):
+    r'''
+    Return a dictionary of the benchmarks, which are functions of no arguments
+    '''
+    stdout, stderr = git_output(size)
+    status = porcelain(size)
+    first = next(iter(cat.catalogue))
+
+    def uncached_read():
+        cat.parse_catalogue()
+
+    def move():
+        cat.move_repository(first, -1)
+        cat.move_repository(first, 0)
+
+    def selected(repositories, exclude=()):
+        def select():
+            cat.options.repositories = list(repositories)
+            cat.options.exclude = list(exclude)
+            try:
+                return list(cat.repositories())
+            finally:
+                cat.options.repositories = []
+                cat.options.exclude = []
+        return select
+
+    return {
+        'read_catalogue (parse)': uncached_read,
+        'read_catalogue (cached)': cat.read_catalogue,
+        'save_catalogue': cat.save_catalogue,
+        'list_catalogue (listing)': lambda: cat.list_catalogue(listing=True),
+        'list_catalogue (ls)': lambda: cat.list_catalogue(listing=False),
+        # each of these selects a tenth of the catalogue
+        'repositories (filter)': selected(['project0[0-9]*0$']),
+        'repositories (group)': selected(['@tenth']),
+        'repositories (exclude)': selected(['@tenth'], ['project000[0-9]0$']),
+        'move_repository (x2)': move,
+        'Git.format_output': lambda: gitcat.Git.format_output(stdout, stderr),
+        'GitStatus': lambda: gitcat.GitStatus(status),
+        'parser (one command)': lambda: gitcat.setup_command_line_parser(gitcat.settings, ['status']),
+        'parser (all commands)': lambda: gitcat.setup_command_line_parser(gitcat.settings),
+    }
+
+
+def main():
+    r'''
+    Run the benchmarks and print the results
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark the python hot paths in git cat')
+    parser.add_argument('-n', '--repositories', type=int, default=10000,
+                        help='number of repositories in the catalogue, and lines of git output')
+    parser.add_argument('-r', '--runs', type=int, default=5, help='number of runs of each benchmark')
+    parser.add_argument('--json', type=str, default=None, help='save the results in this file')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='gitcat-hotpaths-') as home:
+        # git cat reads its settings, and writes its caches, in the home directory
+        os.environ['HOME'] = home
+        os.environ.pop('XDG_CACHE_HOME', None)
+        sys.path.insert(0, GITCAT)
+        import gitcat
+        gitcat.load_settings()
+
+        cat = make_gitcat(gitcat, home, options.repositories)
+
+        results = {
+            'python': sys.version.split()[0],
+            'repositories': options.repositories,
+            'benchmarks (ms per call)': {},
+        }
+        for name, function in benchmarks(gitcat, cat, options.repositories).items():
+            timer = timeit.Timer(function)
+            number, _ = timer.autorange()
+            times = [1000 * time / number for time in timer.repeat(options.runs, number)]
+            results['benchmarks (ms per call)'][name] = {
+                'median': statistics.median(times),
+                'min': min(times),
+            }
+
+    print(f'{options.repositories} repositories, python {results["python"]}')
+    print(f'  {"benchmark":<28} {"median ms":>10} {"min ms":>10}')
+    for name, result in results['benchmarks (ms per call)'].items():
+        print(f'  {name:<28} {result["median"]:10.3f} {result["min"]:10.3f}')
+
+    if options.json is not None:
+        with open(options.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+r'''
+-----------------------------------------------------------------------------------------
+    startup | benchmark the startup time of git cat
+
+      - python3 benchmarks/startup.py              :  print a summary
+      - python3 benchmarks/startup.py --json FILE  :  also save the results as JSON
+
+    Copyright (C) Andrew Mathas
+
+    Distributed under the terms of the GNU General Public License (GPL)
+                  http://www.gnu.org/licenses/
+
+    <Andrew.Mathas@gmail.com>
+-----------------------------------------------------------------------------------------
+
+Measure how long it takes to start git cat. This reports:
+
+    - the cumulative import time of gitcat, and of the slowest modules that it
+      imports, using `python -X importtime`
+    - the wall time of running the git-cat entry point with `--version` and
+      with `ls` on an empty catalogue
+
+Everything is run in a temporary home directory so that the results do not
+depend on the gitcatrc file or the cache directory of the user. Each
+measurement is repeated and the median is reported.
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+GITCAT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run the git-cat entry point in the same way as the console script
+ENTRY_POINT = 'import sys; sys.argv[0] = "git-cat"; from gitcat import main; main()'
+
+
+def environment(home):
+    r'''
+    Return the environment for running git cat in the home directory `home`
+    '''
+    env = dict(os.environ, HOME=home, PYTHONPATH=GITCAT)
+    env.pop('XDG_CACHE_HOME', None)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def import_times(env):
+    r'''
+    Return a dictionary of the cumulative import times, in microseconds, of
+    the modules imported by `import gitcat`
+    '''
+    importing = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import gitcat'],
+                               env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in importing.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, module = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return times
+
+
+def wall_time(env, args):
+    r'''
+    Return the wall time, in seconds, of running the git-cat entry point with
+    the command line arguments `args`
+    '''
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', ENTRY_POINT, *args], env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    r'''
+    Run the startup benchmarks and print the results
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark the startup time of git cat')
+    parser.add_argument('-r', '--runs', type=int, default=10, help='number of runs of each benchmark')
+    parser.add_argument('--json', type=str, default=None, help='save the results in this file')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='gitcat-startup-') as home:
+        env = environment(home)
+        with open(os.path.join(home, '.gitcatrc'), 'w') as gitcatrc:
+            gitcatrc.write('Catalogue:\n')
+
+        # the first run creates the pyc and option caches
+        wall_time(env, ['--version'])
+
+        imports = [import_times(env) for _ in range(options.runs)]
+        results = {
+            'python': sys.version.split()[0],
+            'import gitcat (ms)': statistics.median(times['gitcat'] for times in imports) / 1000,
+            'git cat --version (ms)': 1000 * statistics.median(wall_time(env, ['--version']) for _ in range(options.runs)),
+            'git cat ls (ms)': 1000 * statistics.median(wall_time(env, ['ls']) for _ in range(options.runs)),
+            'slowest imports (ms)': {
+                module: statistics.median(times.get(module, 0) for times in imports) / 1000
+                for module in sorted(imports[0], key=imports[0].get, reverse=True)[1:11]
+            }
+        }
+
+    for key, val in results.items():
+        if isinstance(val, dict):
+            print(f'{key}:')
+            for module, ms in val.items():
+                print(f'  {module:<30} {ms:8.2f}')
+        elif isinstance(val, float):
+            print(f'{key:<32} {val:8.2f}')
+        else:
+            print(f'{key:<32} {val:>8}')
+
+    if options.json is not None:
+        with open(options.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
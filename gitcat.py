@@ -38,12 +38,21 @@ Examples:
     > git cat pull Code  # pull from all "Code" repositories
 
 This makes it possible, for example, to push or pull from related git
-repositories that are in different directories.
+repositories that are in different directories. Repositories can also be put
+into groups by adding labels such as `@work` after their URLs in the gitcatrc
+file, and then selected using these labels. Repositories are excluded using
+`--exclude`, which accepts both regular expressions and groups:
+
+    > git cat pull @work @papers          # pull from the work and papers groups
+    > git cat pull @work --exclude Old    # pull from the work group, except Old
 
 The remote repositories are accessed in the normal way using git. Ideally, they
 will be set up with ssh access so that passwords are not required. If git
 requires a password for a repository then you will be prompted to supply it in
-the usual way.
+the usual way. As several repositories are processed at the same time, the
+prompts can be mixed up with each other, so use `--jobs 1` if you need to type
+passwords. Passwords cannot be prompted for when `--timeout` or `--deadline` is
+used.
 
 .. warning::
    `git cat`_ is designed to automatically push and pull git repositories. It will
@@ -105,56 +114,43 @@ PARTICULAR PURPOSE.  See the GNU General Public License for more details.
 #     automatically generate the command line options
 #  - add options for sorting catalogue
 #  - make status check that changes have been pushed
-#  - add a fast option
-#  - add exclude option
-#  - use parallel processing
 #  - ? add a "git cat git" command
 #  - ? make "git cat pull" first update the repository containing the gitcatrc file and
 #     then reread it
 
+# Importing gitcat has no side effects: the settings are read and the signal
+# handlers are installed by main(). Modules that are only needed by some
+# commands are imported when they are used, to keep the startup time short.
 import argparse
+import collections
+import functools
 import os
+import pickle
 import re
-import shutil
 import signal
 import subprocess
 import sys
-import textwrap
+import threading
+import time
 
-from difflib import get_close_matches
+# compiled regular expressions
 
-try:
-    import argcomplete
-except ImportError:
-    argcomplete = False
+# section in an ini file
+ini_section = re.compile(r'^\[([-a-zA-Z]*)\]$')
 
-# ---------------------------------------------------------------------------
-import socket
-REMOTE_SERVER = "www.google.com"
-def connected_to_internet(hostname=REMOTE_SERVER):
-  try:
-    # see if we can resolve the host name -- tells us if there is
-    # a DNS listening
-    host = socket.gethostbyname(hostname)
-    # connect to the host -- tells us if the host is actually
-    # reachable
-    s = socket.create_connection((host, 80), 2)
-    s.close()
-    return True
-  except:
-     pass
-  return False
+# section, and optional subsection, in a git config file
+ini_subsection = re.compile(r'^\[(?P<section>[-.a-zA-Z0-9]+)(?:\s+"(?P<subsection>(?:[^"\\]|\\.)*)")?\]')
 
-# compiled regular expressions
+# ssh URLs of the form ssh://[user@]host[:port]/path and scp-like URLs of the
+# form [user@]host:path, which are not remote helper URLs like transport::address
+ssh_url = re.compile(r'^(?:git\+)?ssh://(?P<host>[^/:]+)(?::(?P<port>[0-9]+))?/')
+scp_url = re.compile(r'^(?P<host>[^/:]+):(?!//|:)')
 
-# [ahead 1], or [behind 1] or [ahead # 2, behind 1] in status
-ahead_behind = re.compile(r'\[((ahead|behind) [0-9]+(, )?)+\]')
+# other network URLs of the form scheme://[user@]host[:port]/path
+network_url = re.compile(r'^(?P<scheme>[a-z][-a-z0-9+.]*)://(?:[^@/]*@)?(?P<host>[^/:@]+)(?::(?P<port>[0-9]+))?')
 
-# list of files that have changed
-files_changed = re.compile(r'([0-9]+ file(?:s|))(?: changed)')
-
-# section in an ini file
-ini_section = re.compile(r'^\[([-a-zA-Z]*)\]$')
+# default ports for the network protocols used by git
+default_ports = {'ssh': 22, 'git+ssh': 22, 'ssh+git': 22, 'git': 9418, 'http': 80, 'https': 443}
 
 
 # ---------------------------------------------------------------------------
@@ -164,6 +160,7 @@ class Settings(dict):
     command line options.
     """
     DEBUGGING = False
+    OUTPUT = 'text'  # with ndjson, stdout only contains JSON records
 
     def __init__(self, ini_file, git_options_file):
         super().__init__()
@@ -171,6 +168,12 @@ class Settings(dict):
         self.prefix = os.environ['HOME']
         self.quiet = False      # defaults
         self.dry_run = False
+        self.jobs = 8           # number of repositories processed concurrently
+        self.connections = 4    # maximum number of concurrent connections to each host
+        self.reachable_ttl = 60 # seconds that the reachability of a remote server is cached
+
+        # directory for the files that git cat uses to cache information
+        self.cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'gitcat')
 
         # store a dictionary of aliases for the git cat command
         self.command_alias = {}
@@ -179,14 +182,19 @@ class Settings(dict):
         # and then to ~/.gitcatrc
         if os.path.isdir(os.path.expanduser('~/.dotfiles/config')):
             self.rc_file = os.path.expanduser('~/.dotfiles/config/gitcatrc')
-        if not (os.path.isfile(self.rc_file) or hasattr(self, 'rc_file')):
+        if not (hasattr(self, 'rc_file') and os.path.isfile(self.rc_file)):
             self.rc_file = os.path.expanduser('~/.gitcatrc')
 
         # read gitcat ini file, which gives data about gitcat
         self.read_ini_file(ini_file)
 
         self.commands = {}
-        self.read_git_options(git_options_file)
+        self.read_cached_git_options(git_options_file)
+
+        # initial substrings of the commands, of length at least 3, are aliases
+        for cmd in self.commands:
+            for c in range(3, len(cmd)):
+                self.command_alias[cmd[:c]] = cmd
 
         # save the default options
         self.default_options = {}  # will hold non-standard git defaults
@@ -202,25 +210,27 @@ class Settings(dict):
         Return a sanitised version of the doc-string for the method `cmd` of
         `GitCat`. In particuar, all code-blocks are removed.
         '''
+        import textwrap
         return textwrap.dedent(getattr(GitCat, cmd.replace('-','_')).__doc__)
 
-    def add_git_options(self, commands):
+    def add_git_options(self, commands, command=None):
         '''
-        Generate all of the `git cat` command options as parsers of `commands`
+        Generate the `git cat` command options as parsers of `commands`. If
+        `command` is given then only the parser for this command is added.
         '''
         for cmd in self.commands:
-            aliases = []
-            for c in range(3, len(cmd)):
-                self.command_alias[cmd[:c]] = cmd
-                aliases.append(cmd[:c])
+            if command is not None and cmd != command:
+                continue
 
-            command = commands.add_parser(
+            aliases = [cmd[:c] for c in range(3, len(cmd))]
+
+            command_parser = commands.add_parser(
                 cmd,
                 aliases=aliases,
                 help=self.commands[cmd]['description'],
                 description=self.commands[cmd]['description'],
                 formatter_class=argparse.RawTextHelpFormatter,
-                epilog=self.doc_string(cmd)
+                command=cmd
             )
             for option in self.commands[cmd]:
                 if option != 'description':
@@ -230,25 +240,31 @@ class Settings(dict):
                         del options['short-option']
                         debugging('short option = {short_option}.')
                         if short_option is None:
-                            command.add_argument('--' + option, **options)
+                            command_parser.add_argument('--' + option, **options)
                         else:
-                            command.add_argument('-' + short_option,
+                            command_parser.add_argument('-' + short_option,
                                                  '--' + option, **options)
                     else:
-                        command.add_argument('-' + option[:1], '--' + option,
+                        command_parser.add_argument('-' + option[:1], '--' + option,
                                              **self.commands[cmd][option])
 
-            # finally, add the optional repository filter option
+            # finally, add the optional repository selectors
             if 'directory' not in self.commands[cmd]:
-                command.add_argument(
+                command_parser.add_argument(
                     dest='repositories',
                     type=str,
-                    default='',
-                    nargs='?',
-                    help='optionally filter repositories for status')
+                    default=[],
+                    nargs='*',
+                    help='optionally select repositories using regular expressions and @groups')
+                command_parser.add_argument(
+                    '--exclude',
+                    type=str,
+                    default=[],
+                    action='append',
+                    help='exclude the repositories matching a regular expression or @group')
 
             # add a quiet option
-            command.add_argument(
+            command_parser.add_argument(
                 '-q', '--quiet',
                 default=False,
                 action='store_true',
@@ -270,6 +286,23 @@ class Settings(dict):
                     else:
                         setattr(self, '_' + key.lower(), val)
 
+    def read_cached_git_options(self, options_file):
+        '''
+        Read and store the information in the command-line options file using
+        a pickled copy of the options that is stored in the cache directory.
+        The cache is rebuilt whenever the modification time or size of
+        `options_file` changes.
+        '''
+        stat = os.stat(options_file)
+        key = (os.path.abspath(options_file), stat.st_mtime_ns, stat.st_size)
+        cache_file = os.path.join(self.cache_dir, 'git-options.pickle')
+        commands = load_cache(cache_file, key)
+        if commands is not None:
+            self.commands = commands
+        else:
+            self.read_git_options(options_file)
+            save_cache(cache_file, key, self.commands)
+
     def read_git_options(self, options_file):
         '''
         Read and store the information in the command-line options file
@@ -338,7 +371,26 @@ class Settings(dict):
 
 
 file = lambda f: os.path.join(os.path.dirname(__file__), f)
-settings = Settings(file('gitcat.ini'), file('git-options.ini'))
+
+def load_settings():
+    r'''
+    Return the gitcat settings, which are read from the gitcat.ini and
+    git-options.ini files the first time that they are needed.
+    '''
+    global settings
+    if 'settings' not in globals():
+        settings = Settings(file('gitcat.ini'), file('git-options.ini'))
+    return settings
+
+
+def __getattr__(name):
+    r'''
+    Read the settings when `gitcat.settings` is first accessed from outside
+    this module, such as by setup.py.
+    '''
+    if name == 'settings':
+        return load_settings()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 # ---------------------------------------------------------------------------
@@ -347,26 +399,881 @@ def error_message(err):
     r'''
     Print error message and exit.
     '''
-    print(f'git cat error: {err}')
+    print(f'git cat error: {err}', file=diagnostics())
     sys.exit(1)
 
 
+def diagnostics():
+    r'''
+    Return the stream for the messages that are not about a repository,
+    which is stderr with `--output ndjson`, so that stdout only contains
+    JSON records, and otherwise stdout.
+    '''
+    return sys.stderr if Settings.OUTPUT == 'ndjson' else sys.stdout
+
+
 def debugging(message):
     """ print a debugging message if `debugging` is true"""
-    if settings.DEBUGGING:
+    if Settings.DEBUGGING:
         print(message)
 
 
+# output is buffered per thread when repositories are processed concurrently
+output_buffer = threading.local()
+
+def write(message, ending=None):
+    r'''
+    Print `message`, with `ending` as the ending, to stdout or, when
+    processing a repository in a worker thread, to the output buffer for that
+    repository so that it can be printed later in catalogue order.
+    '''
+    buffer = getattr(output_buffer, 'lines', None)
+    if buffer is None:
+        sys.stdout.write(f'{message}{chr(10) if ending is None else ending}')
+    else:
+        buffer.append(f'{message}{chr(10) if ending is None else ending}')
+
+
+def record(**fields):
+    r'''
+    Add `fields` to the record of the repository that is being processed by
+    this thread when the output is NDJSON. Otherwise, do nothing.
+    '''
+    results = getattr(output_buffer, 'record', None)
+    if results is not None:
+        results.update(fields)
+
+
+class Renderer:
+    r'''
+    Usage: Renderer(reps, stream=sys.stdout, ordered=True)
+
+    Print the output for the repositories in `reps`, which is given to
+    `result(rep, output)` in the order that the repositories finish, in
+    catalogue order as soon as all of the repositories before it have
+    finished. When `stream` is a terminal, a progress line showing how many
+    repositories have finished, and an estimate of the time remaining, is
+    kept below the output. Nothing extra is printed when `stream` is not a
+    terminal. Call `close()` to remove the progress line at the end.
+
+    If `ordered` is `False` then the output for each repository is printed
+    as soon as it finishes, without a progress line.
+    '''
+    def __init__(self, reps, stream=None, ordered=True):
+        self.reps = list(reps)
+        self.ordered = ordered
+        self.stream = sys.stdout if stream is None else stream
+        self.pending = {}    # output for repositories that cannot be printed yet
+        self.printed = 0     # number of repositories that have been printed
+        self.finished = 0    # number of repositories that have finished
+        self.start = time.monotonic()
+        try:
+            self.progress = ordered and self.stream.isatty()
+        except (AttributeError, ValueError):
+            self.progress = False
+        self.show('')
+
+    def result(self, rep, output):
+        r'''
+        Record the `output` for `rep` and print all of the output that is now
+        ready in catalogue order
+        '''
+        self.finished += 1
+        if not self.ordered:
+            self.show(output)
+            return
+
+        self.pending[rep] = output
+        ready = []
+        while self.printed < len(self.reps) and self.reps[self.printed] in self.pending:
+            ready.append(self.pending.pop(self.reps[self.printed]))
+            self.printed += 1
+        self.show(''.join(ready))
+
+    def show(self, output):
+        r'''
+        Write `output` and then redraw the progress line, if there is one
+        '''
+        if self.progress:
+            # clear the progress line before printing over it
+            output = '\r\x1b[K' + output
+            if self.finished < len(self.reps):
+                output += f'[{self.finished}/{len(self.reps)}]'
+                if self.finished > 0:
+                    elapsed = time.monotonic() - self.start
+                    remaining = elapsed * (len(self.reps) - self.finished) / self.finished
+                    output += f' about {remaining:.0f}s remaining'
+        if output != '':
+            self.stream.write(output)
+            self.stream.flush()
+
+    def close(self):
+        r''' Remove the progress line '''
+        if self.progress:
+            self.stream.write('\r\x1b[K')
+        self.stream.flush()
+
+
+# ---------------------------------------------------------------------------
+# caching information between runs of git cat
+def load_cache(cache_file, key):
+    r'''
+    Return the data that was saved in `cache_file` by `save_cache` if it was
+    saved with the same `key`, and otherwise return `None`.
+    '''
+    try:
+        with open(cache_file, 'rb') as cache:
+            cached_key, data = pickle.load(cache)
+    except (OSError, EOFError, AttributeError, ImportError, IndexError,
+            TypeError, ValueError, pickle.UnpicklingError):
+        return None
+    return data if cached_key == key else None
+
+
+def save_cache(cache_file, key, data):
+    r'''
+    Pickle `key` and `data` in `cache_file`. The file is written atomically
+    because other git cats may be reading it. As this is only a cache, any
+    errors are ignored.
+    '''
+    import tempfile
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(cache_file), delete=False) as cache:
+            pickle.dump((key, data), cache, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cache.name, cache_file)
+    except OSError as err:
+        debugging(f'unable to save {cache_file}: {err}')
+
+
 # ---------------------------------------------------------------------------
 def graceful_exit(sig, frame):
-    ''' exit gracefully on SIGINT and SIGTERM '''
+    ''' exit gracefully on SIGINT and SIGTERM, killing any running git commands '''
+    Git.terminate_all()
     print(f'program terminated (signal {sig})')
     debugging(f'{frame}')
     sys.exit()
 
 
-signal.signal(signal.SIGINT, graceful_exit)
-signal.signal(signal.SIGTERM, graceful_exit)
+# ---------------------------------------------------------------------------
+# finding git repositories without running git
+def is_git_directory(git_dir):
+    r'''
+    Return `True` if `git_dir` looks like a git directory, which is either the
+    `.git` directory of a repository or the git directory of a worktree.
+    '''
+    return os.path.isfile(os.path.join(git_dir, 'HEAD')) and (
+        os.path.isdir(os.path.join(git_dir, 'objects'))
+        or os.path.isfile(os.path.join(git_dir, 'commondir')))
+
+
+@functools.lru_cache(maxsize=None)
+def git_root(dire):
+    r'''
+    Return the root directory of the git working tree that contains the
+    directory `dire`, or `None` if `dire` is not inside a git working tree.
+
+    This gives the same answer as `git rev-parse --show-toplevel` without
+    running git. A working tree has a `.git` directory or, for worktrees and
+    submodules, a `.git` file of the form `gitdir: <path>`. As with git, the
+    `GIT_DIR` and `GIT_WORK_TREE` environment variables override this
+    search. The results are cached for the whole run, and the parent
+    directories are found using `git_root` so that they are only checked once.
+    '''
+    dire = os.path.abspath(dire)
+
+    if os.environ.get('GIT_DIR'):
+        if not is_git_directory(os.environ['GIT_DIR']):
+            return None
+        work_tree = os.environ.get('GIT_WORK_TREE')
+        if work_tree is None:
+            return dire
+        work_tree = os.path.abspath(work_tree)
+        return work_tree if os.path.commonpath([dire, work_tree]) == work_tree else None
+
+    if '.git' in dire.split(os.sep):
+        return None # inside a git directory, rather than a working tree
+
+    dot_git = os.path.join(dire, '.git')
+    if os.path.isdir(dot_git):
+        if is_git_directory(dot_git):
+            return dire
+    elif os.path.isfile(dot_git):
+        try:
+            with open(dot_git, 'r') as gitfile:
+                gitdir = gitfile.readline().strip()
+        except OSError:
+            gitdir = ''
+        if gitdir.startswith('gitdir:'):
+            gitdir = os.path.join(dire, gitdir[len('gitdir:'):].strip())
+            if is_git_directory(gitdir):
+                return dire
+
+    parent = os.path.dirname(dire)
+    return None if parent == dire else git_root(parent)
+
+
+def git_directory(dire):
+    r'''
+    Return the git directory of the working tree `dire`, following a `.git`
+    file of the form `gitdir: <path>` for worktrees and submodules.
+    '''
+    dot_git = os.path.join(dire, '.git')
+    if os.path.isfile(dot_git):
+        try:
+            with open(dot_git, 'r') as gitfile:
+                gitdir = gitfile.readline().strip()
+            if gitdir.startswith('gitdir:'):
+                return os.path.join(dire, gitdir[len('gitdir:'):].strip())
+        except OSError:
+            pass
+    return dot_git
+
+
+def common_directory(git_dir):
+    r'''
+    Return the directory that contains the refs and the config file of the
+    repository with git directory `git_dir`, which is different from
+    `git_dir` for worktrees.
+    '''
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'r') as commondir:
+            return os.path.join(git_dir, commondir.readline().strip())
+    except OSError:
+        return git_dir
+
+
+def fingerprint(dire, fetch_head=True, work_tree=True):
+    r'''
+    Return a cheap fingerprint of the state of the git repository in `dire`
+    that is built from the stat data of the index, `HEAD`, the branch that
+    `HEAD` points to, the reflog of `HEAD`, the directories of the branches
+    and remote-tracking branches, `packed-refs` and, if `fetch_head` is
+    `True`, `FETCH_HEAD`. If `work_tree` is `True` then the working tree
+    directory is included so that files that are created or deleted at the
+    top-level are noticed. Only `stat()` is used, so git is not run.
+
+    Changes to files that are edited in place, and that have not been staged,
+    are not detected by the fingerprint, so `index_matches_work_tree` should
+    also be checked.
+    '''
+    git_dir = git_directory(dire)
+    common_dir = common_directory(git_dir)
+
+    paths = [os.path.join(git_dir, 'index'), os.path.join(git_dir, 'HEAD'),
+             os.path.join(git_dir, 'logs', 'HEAD'),
+             os.path.join(common_dir, 'packed-refs'), os.path.join(common_dir, 'refs', 'heads')]
+    try:
+        # the branch can be in a subdirectory of refs/heads, such as feature/x
+        with open(os.path.join(git_dir, 'HEAD'), 'r') as head_file:
+            head = head_file.readline().strip()
+        if head.startswith('ref:'):
+            paths.append(os.path.join(common_dir, head[len('ref:'):].strip()))
+    except OSError:
+        pass
+    if work_tree:
+        paths.append(dire)
+    if fetch_head:
+        paths.append(os.path.join(git_dir, 'FETCH_HEAD'))
+    remotes = os.path.join(common_dir, 'refs', 'remotes')
+    try:
+        paths.extend(os.path.join(remotes, remote) for remote in sorted(os.listdir(remotes)))
+    except OSError:
+        pass
+
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stats.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        except OSError:
+            stats.append(None)
+    return tuple(stats)
+
+
+def read_refs(common_dir):
+    r'''
+    Return a dictionary of the branches, remote-tracking branches and tags of
+    the repository whose refs are in `common_dir`, with the object names of
+    their tips as values. The loose refs override those in `packed-refs` and
+    symbolic refs are ignored.
+    '''
+    refs = {}
+    try:
+        with open(os.path.join(common_dir, 'packed-refs'), 'r') as packed_refs:
+            for line in packed_refs:
+                if line.strip() and line[0] not in '#^':
+                    sha, ref = line.split()
+                    refs[ref] = sha
+    except OSError:
+        pass
+
+    for branches in ['heads', 'remotes', 'tags']:
+        top = os.path.join(common_dir, 'refs', branches)
+        for dire, _, files in os.walk(top):
+            for ref in files:
+                try:
+                    with open(os.path.join(dire, ref), 'r') as loose:
+                        sha = loose.readline().strip()
+                except OSError:
+                    continue
+                if not sha.startswith('ref:'):
+                    refs[os.path.relpath(os.path.join(dire, ref), common_dir).replace(os.sep, '/')] = sha
+    return refs
+
+
+def read_git_config(common_dir):
+    r'''
+    Return a dictionary of the sections of the config file of the repository
+    in `common_dir`, with keys `(section, subsection)`, whose values are
+    dictionaries of the settings in the sections, with their names in lower
+    case. Return `None` if the config file cannot be read without git, such
+    as when it includes other files, and raise `OSError` if it cannot be
+    opened.
+    '''
+    config = collections.defaultdict(dict)
+    section = None
+    with open(os.path.join(common_dir, 'config'), 'r') as config_file:
+        for line in config_file:
+            line = line.strip()
+            if line == '' or line[0] in '#;':
+                continue
+            if line.startswith('['):
+                section = ini_subsection.match(line)
+                if section is None:
+                    return None
+                section = (section.group('section').lower(), section.group('subsection'))
+                if section[0] in ('include', 'includeif'):
+                    return None
+            elif '=' in line and section is not None:
+                key, val = line.split('=', 1)
+                config[section][key.strip().lower()] = val.strip().strip('"')
+    return config
+
+
+@functools.lru_cache(maxsize=None)
+def has_ssh_command(dire):
+    r'''
+    Return `True` if the repository in `dire` may set its own ssh command,
+    using `core.sshCommand`, in its config file. Directories that are not
+    repositories have no ssh command.
+    '''
+    try:
+        config = read_git_config(common_directory(git_directory(dire)))
+    except OSError:
+        return False
+    return config is None or 'sshcommand' in config.get(('core', None), {})
+
+
+def branch_upstreams(common_dir):
+    r'''
+    Return a dictionary of the branches that have an upstream branch in the
+    config file of the repository in `common_dir`, with the refs of their
+    remote-tracking branches as values. Return `None` if this cannot be
+    worked out without git, such as when the config file includes other
+    files or a remote does not use the default fetch refspec.
+    '''
+    try:
+        config = read_git_config(common_dir)
+    except OSError:
+        return None
+    if config is None:
+        return None
+
+    upstreams = {}
+    for (section, branch), values in config.items():
+        if section != 'branch' or branch is None or 'remote' not in values or 'merge' not in values:
+            continue
+        remote, merge = values['remote'], values['merge']
+        if remote == '.':
+            upstreams['refs/heads/' + branch] = merge
+        elif merge.startswith('refs/heads/'):
+            fetch = config.get(('remote', remote), {}).get('fetch')
+            if fetch != f'+refs/heads/*:refs/remotes/{remote}/*':
+                return None
+            upstreams['refs/heads/' + branch] = f'refs/remotes/{remote}/{merge[len("refs/heads/"):]}'
+        else:
+            return None
+    return upstreams
+
+
+def index_matches_work_tree(dire, git_dir):
+    r'''
+    Return `True` if the stat data of every file in the index of the
+    repository in `dire` matches the file in the working tree, in which case
+    git will not find any unstaged changes, and `False` otherwise. This also
+    returns `False` whenever the index cannot be checked without git, such
+    as for split indexes, unmerged files and submodules, and for files that
+    changed so close to the index that their stat data cannot be trusted.
+    '''
+    import stat
+    import struct
+    index = os.path.join(git_dir, 'index')
+    try:
+        index_mtime = os.stat(index).st_mtime_ns
+        with open(index, 'rb') as index_file:
+            data = index_file.read()
+    except OSError:
+        return False
+
+    if data[:4] != b'DIRC':
+        return False
+    version, entries = struct.unpack_from('>II', data, 4)
+    if version not in (2, 3, 4):
+        return False
+
+    pos = 12
+    path = b''
+    for _ in range(entries):
+        _, _, mtime, mtime_ns, _, _, mode, _, _, size, = struct.unpack_from('>10I', data, pos)
+        flags, = struct.unpack_from('>H', data, pos + 60)
+        start = pos + 62
+        extended = 0
+        if flags & 0x4000:
+            extended, = struct.unpack_from('>H', data, start)
+            start += 2
+        if version == 4:
+            # the path is compressed using the path of the previous entry
+            strip = data[start] & 0x7f
+            while data[start] & 0x80:
+                start += 1
+                strip = ((strip + 1) << 7) | (data[start] & 0x7f)
+            start += 1
+            end = data.index(b'\0', start)
+            path = path[:len(path) - strip] + data[start:end]
+            pos = end + 1
+        else:
+            # entries are padded with 1-8 nul bytes to a multiple of 8 bytes
+            end = data.index(b'\0', start)
+            path = data[start:end]
+            pos += (end - pos + 8) & ~7
+
+        if extended & 0x4000:
+            continue  # skip-worktree entries are not checked by git
+        if flags & 0x3000 or extended & 0x2000 or stat.S_IFMT(mode) not in (stat.S_IFREG, stat.S_IFLNK):
+            return False  # unmerged, intent-to-add or a submodule
+
+        try:
+            file_stat = os.lstat(os.path.join(dire, os.fsdecode(path)))
+        except OSError:
+            return False
+        if (stat.S_IFMT(file_stat.st_mode) != stat.S_IFMT(mode)
+                or (stat.S_ISREG(mode) and (file_stat.st_mode & 0o100) != (mode & 0o100))
+                or file_stat.st_size & 0xffffffff != size
+                or file_stat.st_mtime_ns // 1000000000 != mtime
+                or (mtime_ns != 0 and file_stat.st_mtime_ns % 1000000000 != mtime_ns)
+                or file_stat.st_mtime_ns >= index_mtime):
+            return False
+
+    # the split index extension means that the entries are incomplete
+    while pos + 28 <= len(data):
+        extension, size = struct.unpack_from('>4sI', data, pos)
+        if extension == b'link':
+            return False
+        pos += 8 + size
+    return True
+
+
+# ---------------------------------------------------------------------------
+# watching repositories for the git cat daemon
+class Inotify:
+    r'''
+    Usage: Inotify()
+
+    A minimal wrapper, using ctypes, around the inotify API of linux. Use
+    `watch(path, owner)` to watch the directory `path` for changes to its
+    entries, or to the files in it, and `read()` to return the events as a
+    list of tuples `(owner, path, name, mask)`. A directory can be watched
+    for several owners, in which case each event is returned for each owner.
+    An `OSError` is raised if inotify is not available.
+    '''
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+            | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+    def __init__(self):
+        import ctypes
+        try:
+            self.libc = ctypes.CDLL(None, use_errno=True)
+            self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (AttributeError, OSError):
+            raise OSError('inotify is not available on this system')
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.watches = {}  # watch descriptor -> (path, owners)
+
+    def watch(self, path, owner):
+        r''' Watch the directory `path` for changes on behalf of `owner` '''
+        import ctypes
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()), path)
+        self.watches.setdefault(wd, (path, set()))[1].add(owner)
+
+    def read(self):
+        r'''
+        Return the list of the events `(owner, path, name, mask)` that are
+        waiting to be read. If events have been lost then the event
+        `(None, None, None, IN_Q_OVERFLOW)` is returned.
+        '''
+        import struct
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = struct.unpack_from('iIII', data, pos)
+                name = os.fsdecode(data[pos + 16:pos + 16 + length].rstrip(b'\0'))
+                pos += 16 + length
+                if mask & self.IN_Q_OVERFLOW:
+                    events.append((None, None, None, mask))
+                elif mask & self.IN_IGNORED:
+                    self.watches.pop(wd, None)
+                elif wd in self.watches:
+                    path, owners = self.watches[wd]
+                    events.extend((owner, path, name, mask) for owner in owners)
+
+    def fileno(self):
+        r''' Return the file descriptor, so that an Inotify can be used with select '''
+        return self.fd
+
+    def close(self):
+        r''' Stop watching all of the directories '''
+        os.close(self.fd)
+
+
+def daemon_socket():
+    r'''
+    Return the name of the Unix socket that the git cat daemon listens on
+    '''
+    return os.path.join(settings.cache_dir, 'daemon.sock')
+
+
+def query_daemon(request):
+    r'''
+    Send the dictionary `request` to the git cat daemon and return its reply,
+    or `None` if the daemon is not running.
+    '''
+    import json
+    import socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            # a daemon that is stuck must not hang git cat
+            client.settimeout(10)
+            client.connect(daemon_socket())
+            client.sendall(json.dumps(request).encode() + b'\n')
+            reply = b''.join(iter(lambda: client.recv(65536), b''))
+        return json.loads(reply)
+    except (OSError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+def project_name(url):
+    r'''
+    Return the name of the project in the remote `url`, which is the last
+    component of its path without `.git`. Forks of the same project usually
+    have the same name.
+    '''
+    name = url.rstrip('/').replace(':', '/').rsplit('/', 1)[-1]
+    return (name[:-len('.git')] if name.endswith('.git') else name).lower()
+
+
+# ---------------------------------------------------------------------------
+# sharing ssh connections between repositories
+def remote_host(url):
+    r'''
+    Return the pair `(host, port)` for the ssh server in the remote `url`,
+    where `host` may include a user name, or `None` if `url` does not use ssh.
+    The `port` is `None` unless it is given in the URL. Paths that start with
+    a drive letter, such as `C:/foo`, are local.
+    '''
+    match = ssh_url.match(url)
+    if match:
+        return match.group('host'), match.group('port')
+    match = scp_url.match(url)
+    if match and not os.path.exists(url) and not re.match(r'[A-Za-z]:[/\\]', url):
+        return match.group('host'), None
+    return None
+
+
+def url_host(url):
+    r'''
+    Return the name of the server for the remote `url`, without any user
+    name, or `None` if `url` is a local repository.
+    '''
+    host = remote_host(url)
+    if host is not None:
+        return host[0].split('@')[-1]
+    match = network_url.match(url)
+    return None if match is None else match.group('host')
+
+
+def remote_address(url):
+    r'''
+    Return the triple `(scheme, host, port)` that git connects to for the
+    remote `url`, or `None` if `url` is a local repository. For ssh, the
+    `host` is as given in the URL, which can be an alias in the ssh
+    configuration, and `port` is `None` unless it is given in the URL.
+    '''
+    host = remote_host(url)
+    if host is not None:
+        return 'ssh', host[0], None if host[1] is None else int(host[1])
+    match = network_url.match(url)
+    if match is None or match.group('scheme') not in default_ports:
+        return None
+    if default_ports[match.group('scheme')] == 22:
+        return 'ssh', match.group('host'), None if match.group('port') is None else int(match.group('port'))
+    return (match.group('scheme'), match.group('host'),
+            int(match.group('port') or default_ports[match.group('scheme')]))
+
+
+def ssh_destination(host, port=None):
+    r'''
+    Return the pair `(hostname, port)` that ssh connects to for `host`, using
+    `ssh -G` so that the aliases, host names and ports in the ssh
+    configuration files are respected. Return `None` if ssh connects
+    through a proxy, or if its configuration cannot be read, as then the
+    server cannot be probed directly.
+    '''
+    command = ['ssh', '-G', host] if port is None else ['ssh', '-G', '-p', str(port), host]
+    try:
+        config = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True,
+                                text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if config.returncode != 0:
+        return None
+    options = dict(line.split(' ', 1) for line in config.stdout.splitlines() if ' ' in line)
+    if options.get('proxyjump', 'none') != 'none' or options.get('proxycommand', 'none') != 'none':
+        return None
+    try:
+        return options.get('hostname', host), int(options.get('port', port or 22))
+    except ValueError:
+        return None
+
+
+def probe(address, timeout=2):
+    r'''
+    Return `True` if it is possible to connect to `address`, which is a
+    triple `(scheme, host, port)`, within `timeout` seconds. The address of
+    an ssh server is found using the ssh configuration and, if this is not
+    possible, the server is assumed to be reachable so that git still tries
+    to connect to it.
+    '''
+    import socket
+    scheme, host, port = address
+    if scheme == 'ssh':
+        destination = ssh_destination(host, port)
+        if destination is None:
+            debugging(f'unable to probe {host}, so assuming that it is reachable')
+            return True
+    else:
+        destination = host, port
+    try:
+        with socket.create_connection(destination, timeout):
+            return True
+    except OSError:
+        return False
+
+
+def reachable(addresses, state_file, ttl):
+    r'''
+    Return a dictionary that records whether each of the `(scheme, host,
+    port)` triples in `addresses` can be reached. The servers are probed in parallel
+    and the results are cached in `state_file` for `ttl` seconds, so that
+    servers are not probed every time that git cat is run.
+    '''
+    import json
+    try:
+        with open(state_file, 'r') as state:
+            cache = json.load(state)
+    except (OSError, ValueError):
+        cache = {}
+
+    now = time.time()
+    key = lambda address: f'{address[0]}://{address[1]}:{address[2]}'
+    addresses = set(addresses)
+    stale = [address for address in addresses
+             if key(address) not in cache or now - cache[key(address)][0] > ttl]
+    if stale:
+        import tempfile
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+            for address, ok in zip(stale, pool.map(probe, stale)):
+                debugging(f'probed {address}: reachable={ok}')
+                cache[key(address)] = [now, ok]
+
+        # write the state file atomically as other git cats may be reading it
+        try:
+            os.makedirs(os.path.dirname(state_file), exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(state_file), delete=False) as state:
+                json.dump({address: result for address, result in cache.items()
+                           if now - result[0] <= ttl}, state)
+            os.replace(state.name, state_file)
+        except OSError as err:
+            debugging(f'unable to save {state_file}: {err}')
+
+    return {address: cache[key(address)][1] for address in addresses}
+
+
+class HostScheduler:
+    r'''
+    Usage: HostScheduler(hosts, limit, host_limits)
+
+    Hand out the repositories in the dictionary `hosts`, which maps each
+    repository to the server for its remote, to the worker threads so that
+    there are never more than `limit` repositories from the same server being
+    processed at the same time. The dictionary `host_limits` gives different
+    limits for particular servers. Repositories whose server is `None` are
+    not limited.
+
+    The next repository is always taken from the server with the most
+    repositories left that is below its limit, which keeps as many servers
+    busy as possible and so minimises the total time.
+    '''
+
+    def __init__(self, hosts, limit, host_limits):
+        self.queues = collections.defaultdict(collections.deque)
+        for rep, host in hosts.items():
+            self.queues[host].append(rep)
+        self.limits = {host: None if host is None else host_limits.get(host, limit)
+                       for host in self.queues}
+        self.running = collections.Counter()
+        self.condition = threading.Condition()
+
+    def available(self, host):
+        r''' return `True` if another repository from `host` can be processed now '''
+        return self.queues[host] and (self.limits[host] is None
+                                      or self.running[host] < self.limits[host])
+
+    def next(self):
+        r'''
+        Return the next repository and its host, waiting until one is
+        available, or `None` when there are no repositories left.
+        '''
+        with self.condition:
+            while any(self.queues.values()):
+                hosts = [host for host in self.queues if self.available(host)]
+                if hosts:
+                    host = max(hosts, key=lambda host: len(self.queues[host]))
+                    self.running[host] += 1
+                    return self.queues[host].popleft(), host
+                self.condition.wait()
+            return None
+
+    def done(self, host):
+        r''' record that a repository from `host` has been processed '''
+        with self.condition:
+            self.running[host] -= 1
+            self.condition.notify_all()
+
+    def cancel(self):
+        r''' drop all of the remaining repositories '''
+        with self.condition:
+            for queue in self.queues.values():
+                queue.clear()
+            self.condition.notify_all()
+
+
+class SSHConnections:
+    r'''
+    Usage: with SSHConnections(urls): ...
+
+    Open one shared ssh connection, using the ssh ControlMaster option, for
+    each of the ssh servers in the list of remote `urls` and route the git
+    commands through these connections by setting `Git.ssh_command`, which
+    `Git` uses as `GIT_SSH_COMMAND`. The connections are closed when the
+    with-block exits. Nothing is done if `GIT_SSH_COMMAND` or `GIT_SSH` is
+    already set, or if `core.sshCommand` is set in the global git config.
+    Repositories that set `core.sshCommand` themselves do not use the
+    shared connections, as `GIT_SSH_COMMAND` would override their setting.
+
+    The connections are opened before any git commands are run, in parallel,
+    and in batch mode so that ssh never prompts for a password. If a
+    connection cannot be opened then git just connects to that server in the
+    usual way.
+    '''
+
+    def __init__(self, urls):
+        self.hosts = sorted({host for host in map(remote_host, urls) if host is not None},
+                            key=lambda host: (host[0], host[1] or ''))
+        self.control_dir = None
+
+    def ssh(self, host, *options):
+        r'''
+        Return the arguments for running ssh with `options` on the control
+        connection for `host`.
+        '''
+        host, port = host
+        return ['ssh', '-o', f'ControlPath={self.control_path}',
+                *options, *([] if port is None else ['-p', port]), host]
+
+    @property
+    def control_path(self):
+        r''' the control socket used by ssh, which is unique for each host '''
+        return os.path.join(self.control_dir, '%C')
+
+    def open(self, host):
+        r''' open a control connection to the ssh server `host` '''
+        debugging(f'opening ssh connection to {host}')
+        try:
+            subprocess.run(self.ssh(host, '-f', '-N', '-o', 'ControlMaster=yes',
+                                    '-o', 'ControlPersist=60', '-o', 'BatchMode=yes'),
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as err:
+            debugging(f'unable to open ssh connection to {host}: {err}')
+
+    def close(self, host):
+        r''' close the control connection to the ssh server `host` '''
+        subprocess.run(self.ssh(host, '-O', 'exit'), stdin=subprocess.DEVNULL,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def __enter__(self):
+        if (self.hosts and not ('GIT_SSH_COMMAND' in os.environ or 'GIT_SSH' in os.environ)
+                and not self.global_ssh_command()):
+            import tempfile
+            from concurrent.futures import ThreadPoolExecutor
+            self.control_dir = tempfile.mkdtemp(prefix='gitcat-')
+            with ThreadPoolExecutor(max_workers=len(self.hosts)) as pool:
+                list(pool.map(self.open, self.hosts))
+            Git.ssh_command = f'ssh -o ControlMaster=no -o ControlPath={self.control_path}'
+        return self
+
+    @staticmethod
+    def global_ssh_command():
+        r''' Return `True` if `core.sshCommand` is set outside of the repositories '''
+        try:
+            config = subprocess.run(['git', 'config', '--get', 'core.sshCommand'], cwd='/',
+                                    stdin=subprocess.DEVNULL, capture_output=True)
+        except OSError:
+            return False
+        return config.returncode == 0
+
+    def __exit__(self, *exc):
+        if self.control_dir is not None:
+            Git.ssh_command = None
+            for host in self.hosts:
+                self.close(host)
+            import shutil
+            shutil.rmtree(self.control_dir, ignore_errors=True)
+            self.control_dir = None
+
 
 # ---------------------------------------------------------------------------
 # running git commands using subprocess
@@ -375,48 +1282,257 @@ class Git:
     Container class for running a git command and printing an
     error message if necessary.
 
-    Usage: Git(rep, command, options)
+    Usage: Git(rep, command, options, cwd, stream=None)
 
     where
      - rep     is the key for the repository being processed
      - command is the main git command being run
-     - options are the options to the git commend
+     - options is the list of options to the git commend
+     - cwd     is the directory of the repository that git is run in
+     - stream  is `None` or a function that is given each line of the
+               output of git, as bytes, as soon as git prints it
+
+    The git command is run directly, rather than through a shell, so the
+    options are passed to git exactly as given and must not be quoted. The
+    repository is always given explicitly by `cwd`, rather than by changing
+    the current working directory, so that different repositories can be
+    processed at the same time.
 
     The class that is return has attributes:
      - rep        the catalogue key for the respeoctory
      - returncode the return code from the subprocess command
      - output     the stdout and stderr output from the subprocess command
+
+    When `stream` is given the output of git is not kept, so `stdout` is
+    empty and the memory used does not depend on the size of the output.
+
+    The running git processes are recorded in `Git.running` so that they can
+    be killed by `Git.terminate_all()` when git cat is interrupted. When
+    `Git.new_session` is `True` each git command is started in its own
+    process group so that any ssh processes that it starts are killed too.
+    This is only done for --timeout and --deadline because git can then no
+    longer prompt for a password.
+
+    When `Git.calls` is a list, a `GitCall` record of the timing of each git
+    command is appended to it, for `--trace` and `--timings`. When
+    `Git.ssh_command` is set it is used as `GIT_SSH_COMMAND`, except for
+    repositories that set `core.sshCommand`.
+
+    Each git command is stopped, together with its process group, if it runs
+    for more than `Git.timeout` seconds or past `Git.deadline`, which is a
+    time from `time.monotonic()`. Git is given `Git.grace` seconds to remove
+    its lock files before it is killed. No git commands are started after the
+    deadline. In both cases the command is reported as having timed out.
     """
 
-    def __init__(self, rep, command, options=''):
+    running = set()
+    cancelled = threading.Event()
+    lock = threading.RLock()
+    new_session = False
+    calls = None
+    timeout = None
+    deadline = None
+    grace = 2  # seconds that git has to stop after a timeout before it is killed
+    ssh_command = None
+
+    def __init__(self, rep, command, options=(), cwd=None, stream=None):
         """ run a git command and wrap the return values for later use """
-        git = subprocess.run(f'git {command} {options}'.strip(), shell=True, capture_output=True)
+        start = time.perf_counter()
+        timeout = Git.time_left()
+        self.timed_out = False
+        stdout_bytes = 0
+        with Git.lock:
+            git = errors = None
+            if Git.cancelled.is_set():
+                pass
+            elif timeout is not None and timeout <= 0:
+                self.timed_out = True
+            else:
+                if stream is not None:
+                    # stderr goes to a file so that git cannot block on it
+                    # while its stdout is being streamed
+                    import tempfile
+                    errors = tempfile.TemporaryFile()
+                env = None
+                if Git.ssh_command is not None and not has_ssh_command(cwd or os.getcwd()):
+                    env = dict(os.environ, GIT_SSH_COMMAND=Git.ssh_command)
+                try:
+                    git = subprocess.Popen(['git', command, *options], cwd=cwd, env=env,
+                                           stdout=subprocess.PIPE,
+                                           stderr=subprocess.PIPE if stream is None else errors,
+                                           start_new_session=Git.new_session)
+                except BaseException:
+                    if errors is not None:
+                        errors.close()
+                    raise
+                Git.running.add(git)
+
+        if git is None:
+            # git cat has been interrupted, or the deadline has passed, so do
+            # not start any new commands
+            stdout = stderr = b''
+            returncode = -signal.SIGTERM
+        else:
+            try:
+                if stream is None:
+                    try:
+                        stdout, stderr = git.communicate(timeout=timeout)
+                    except subprocess.TimeoutExpired:
+                        self.timed_out = True
+                        Git.stop(git)
+                        stdout, stderr = git.communicate()
+                    stdout_bytes = len(stdout)
+                else:
+                    stdout_bytes = self.stream_output(git, timeout, stream)
+                    stdout = b''
+                    errors.seek(0)
+                    stderr = errors.read()
+            finally:
+                if errors is not None:
+                    errors.close()
+                with Git.lock:
+                    Git.running.discard(git)
+            returncode = git.returncode
+        end = time.perf_counter()
 
         # store the output
         self.rep = rep
-        self.returncode = git.returncode
-        self.command = command + ' ' + options
-
-        if self.returncode != 0:
-            self.error_message = '{}: there was an error using git {} {}\n  {}\n'.format(
+        self.returncode = returncode
+        self.stdout = stdout.decode()
+        self.stderr = stderr.decode()
+        self.command = ' '.join([command, *options])
+
+        if self.timed_out:
+            if git is None:
+                self.error_message = f'{rep}: git {self.command} not run as the deadline has passed\n'
+            else:
+                self.error_message = f'{rep}: git {self.command} timed out after {end - start:.1f} seconds\n'
+            if not Git.cancelled.is_set():
+                write(self.error_message)
+            debugging(self.error_message)
+            self.git_command_ok = False
+        elif self.returncode != 0:
+            self.error_message = '{}: there was an error using git {}\n  {}\n'.format(
                 rep,
-                command,
-                options,
-                git.stderr.decode().strip().replace('\n', '\n  ').replace(
+                self.command,
+                self.stderr.strip().replace('\n', '\n  ').replace(
                     '\r', '\n  '),
             )
-            print(self.error_message)
+            if not Git.cancelled.is_set():
+                write(self.error_message)
             debugging('{line}{err}{line}'.format(line='-' * 40, err=self.error_message))
             self.git_command_ok = False
         else:
             self.git_command_ok = True
 
-        # output is indented two spaces and has no blank lines
-        self.output = '\n'.join('  ' + lin.strip() for lin in (
-            git.stdout.decode().replace('\r', '\n').strip().split('\n') +
-            git.stderr.decode().replace('\r', '\n').strip().split('\n'))
-                                if lin != '')
-        debugging(f'{self}\nstdout={git.stdout}\nstderr={git.stderr}')
+        self.output = Git.format_output(self.stdout, self.stderr)
+        debugging(f'{self}\nstdout={stdout}\nstderr={stderr}')
+        if Git.calls is not None:
+            Git.calls.append(GitCall(rep, command, self.command, start, end, returncode,
+                                     stdout_bytes, len(stderr), threading.get_ident()))
+
+        # add the errors to the NDJSON record of the repository
+        results = getattr(output_buffer, 'record', None)
+        if results is not None:
+            results['stderr'] += self.stderr
+            if self.returncode != 0:
+                results['returncode'] = self.returncode
+            if self.timed_out:
+                results['timed_out'] = True
+
+    def stream_output(self, git, timeout, stream):
+        r'''
+        Give each line of the output of the `git` process to `stream` and
+        return the number of bytes of output. The process is killed if it
+        runs for more than `timeout` seconds or if `stream` raises an error.
+        '''
+        def expire():
+            self.timed_out = True
+            Git.stop(git)
+
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, expire)
+            timer.start()
+        stdout_bytes = 0
+        try:
+            for line in git.stdout:
+                stdout_bytes += len(line)
+                stream(line)
+        except BaseException:
+            Git.stop(git)
+            raise
+        finally:
+            git.stdout.close()
+            git.wait()
+            if timer is not None:
+                timer.cancel()
+        return stdout_bytes
+
+    @staticmethod
+    def format_output(stdout, stderr):
+        r'''
+        Return the output of git, from `stdout` and `stderr`, indented by two
+        spaces and without blank lines
+        '''
+        return '\n'.join('  ' + lin.strip() for lin in (
+            stdout.replace('\r', '\n').strip().split('\n') +
+            stderr.replace('\r', '\n').strip().split('\n'))
+                          if lin != '')
+
+    @staticmethod
+    def terminate_all():
+        r'''
+        Stop any new git commands from starting and terminate all of the git
+        commands that are currently running.
+        '''
+        with Git.lock:
+            Git.cancelled.set()
+            for git in Git.running:
+                Git.kill(git, signal.SIGTERM)
+
+    @staticmethod
+    def kill(git, sig):
+        r'''
+        Send the signal `sig` to the git process `git` and, if it was started
+        in its own session, to every process in its process group
+        '''
+        try:
+            if Git.new_session:
+                os.killpg(git.pid, sig)
+            else:
+                git.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def stop(git):
+        r'''
+        Stop the git process `git`, and its process group, by sending SIGTERM
+        so that git can remove its lock files, such as `index.lock`, and then
+        sending SIGKILL to any processes that are still running after
+        `Git.grace` seconds.
+        '''
+        Git.kill(git, signal.SIGTERM)
+        try:
+            git.wait(timeout=Git.grace)
+        except subprocess.TimeoutExpired:
+            pass
+        # processes started by git, such as hooks, can outlive git
+        Git.kill(git, signal.SIGKILL)
+
+    @staticmethod
+    def time_left():
+        r'''
+        Return the number of seconds that the next git command can run for,
+        or `None` if there is no limit
+        '''
+        limits = []
+        if Git.timeout is not None:
+            limits.append(Git.timeout)
+        if Git.deadline is not None:
+            limits.append(Git.deadline - time.monotonic())
+        return min(limits, default=None)
 
     def __bool__(self):
         ''' return 'self.is_ok` '''
@@ -433,6 +1549,223 @@ class Git:
         )
 
 
+# ---------------------------------------------------------------------------
+class Repository:
+    r'''
+    Usage: Repository(key, path, url, install=(), groups=())
+
+    A compact record for a repository in the catalogue, with attributes:
+     - key      the catalogue key for the repository
+     - path     the absolute path to the repository
+     - url      the URL of the remote repository
+     - host     the server for the remote repository, or `None` if it is local
+     - install  the extra options for `git clone` when installing the repository
+     - groups   the names of the groups that the repository belongs to
+    '''
+    __slots__ = ('key', 'path', 'url', 'host', 'install', 'groups')
+
+    def __init__(self, key, path, url, install=(), groups=()):
+        self.key = key
+        self.path = path
+        self.url = url
+        self.host = url_host(url)
+        self.install = tuple(install)
+        self.groups = tuple(groups)
+
+    def __repr__(self):
+        """ define a __repr__ method for debugging """
+        return (f'Repository({self.key!r}, {self.path!r}, {self.url!r}, '
+                f'{self.install!r}, {self.groups!r})')
+
+    def labels(self):
+        r'''
+        Return the options and group labels that follow the URL of the
+        repository in the gitcatrc file
+        '''
+        return [*self.install, *('@' + group for group in self.groups)]
+
+
+# the timing of a git command, which is recorded by Git when tracing
+GitCall = collections.namedtuple('GitCall', 'rep command options start end returncode stdout_bytes stderr_bytes thread')
+
+
+def write_trace(calls, trace_file):
+    r'''
+    Write the `GitCall` records in `calls` to `trace_file` as a JSON file in
+    the Chrome trace event format, which can be viewed using chrome://tracing
+    or https://ui.perfetto.dev. Each thread of git cat is shown as a track.
+    '''
+    import json
+    origin = min((call.start for call in calls), default=0)
+    threads = {}
+    events = []
+    for call in calls:
+        if call.thread not in threads:
+            threads[call.thread] = len(threads) + 1
+            events.append(dict(name='thread_name', ph='M', pid=os.getpid(), tid=threads[call.thread],
+                               args=dict(name=f'thread {threads[call.thread]}')))
+        events.append(dict(
+            name=f'git {call.command}',
+            cat='git',
+            ph='X',
+            pid=os.getpid(),
+            tid=threads[call.thread],
+            ts=round(1e6 * (call.start - origin)),
+            dur=round(1e6 * (call.end - call.start)),
+            args=dict(repository=call.rep,
+                      command=f'git {call.options}',
+                      returncode=call.returncode,
+                      stdout_bytes=call.stdout_bytes,
+                      stderr_bytes=call.stderr_bytes)))
+    with open(trace_file, 'w') as trace:
+        json.dump(dict(traceEvents=events, displayTimeUnit='ms'), trace)
+
+
+def print_timings(calls, number=10):
+    r'''
+    Print a summary of the `number` repositories that spent the most time
+    running git, and of the `number` slowest git commands, using the
+    `GitCall` records in `calls`.
+    '''
+    out = diagnostics()
+    repositories = collections.defaultdict(lambda: [0.0, 0])
+    for call in calls:
+        repositories[call.rep or '-'][0] += call.end - call.start
+        repositories[call.rep or '-'][1] += 1
+    width = max((len(rep) for rep in repositories), default=0) + 1
+
+    print('\nSlowest repositories:', file=out)
+    for rep, (seconds, count) in sorted(repositories.items(), key=lambda item: -item[1][0])[:number]:
+        print(f'  {rep:<{width}} {seconds:8.3f}s  {count} git command{"" if count == 1 else "s"}', file=out)
+    print('Slowest git commands:', file=out)
+    for call in sorted(calls, key=lambda call: call.start - call.end)[:number]:
+        print(f'  {call.rep or "-":<{width}} {call.end - call.start:8.3f}s  git {call.options}', file=out)
+
+
+# ---------------------------------------------------------------------------
+class DiffStat:
+    r'''
+    Usage: DiffStat()
+
+    Count the files and lines that are changed by the patches that are given
+    to `add`, one line at a time, as printed by `git diff`. Only the counts
+    are kept, so the patches can be arbitrarily large. The counts for each
+    repository can be added to a total from several threads using `merge`.
+    '''
+    __slots__ = ('repositories', 'files', 'insertions', 'deletions', 'header', 'lock')
+
+    def __init__(self):
+        self.repositories = self.files = self.insertions = self.deletions = 0
+        self.header = False
+        self.lock = threading.Lock()
+
+    def add(self, line):
+        r'''
+        Add the line `line`, in bytes, of a patch to the counts. The lines in
+        the header of each file are not counted, even if they start with
+        `+++` or `---`.
+        '''
+        if line.startswith(b'diff --git '):
+            self.files += 1
+            self.header = True
+        elif line.startswith(b'@@'):
+            self.header = False
+        elif not self.header:
+            if line.startswith(b'+'):
+                self.insertions += 1
+            elif line.startswith(b'-'):
+                self.deletions += 1
+
+    def merge(self, stat):
+        r'''
+        Add the counts in the `DiffStat` `stat`, for one repository, to these
+        counts
+        '''
+        with self.lock:
+            self.repositories += 1
+            self.files += stat.files
+            self.insertions += stat.insertions
+            self.deletions += stat.deletions
+
+    def __str__(self):
+        return (f'{self.repositories} repositor{"y" if self.repositories == 1 else "ies"}, '
+                f'{self.files} file{"" if self.files == 1 else "s"} changed, '
+                f'{self.insertions} insertion{"" if self.insertions == 1 else "s"}(+), '
+                f'{self.deletions} deletion{"" if self.deletions == 1 else "s"}(-)')
+
+
+# ---------------------------------------------------------------------------
+class GitStatus:
+    r'''
+    Usage: GitStatus(porcelain)
+
+    A record of the status of a repository that is read from the output
+    `porcelain` of
+
+        git status --porcelain=v2 --branch
+
+    The record has attributes:
+     - branch     the current branch, or `None` if the HEAD is detached
+     - upstream   the upstream branch, or `None` if there is no upstream
+     - ahead      the number of commits ahead of the upstream branch
+     - behind     the number of commits behind the upstream branch
+     - staged     the number of files with changes in the index
+     - unstaged   the number of tracked files with changes in the work tree
+     - untracked  the number of untracked files
+     - files      the changed files in the format of `git status --short`
+    '''
+    __slots__ = ('branch', 'upstream', 'ahead', 'behind', 'staged', 'unstaged', 'untracked', 'files')
+
+    def __init__(self, porcelain):
+        self.branch = None
+        self.upstream = None
+        self.ahead = self.behind = 0
+        self.staged = self.unstaged = self.untracked = 0
+        self.files = []
+
+        for line in porcelain.splitlines():
+            if line.startswith('# branch.head '):
+                head = line[len('# branch.head '):]
+                self.branch = None if head == '(detached)' else head
+            elif line.startswith('# branch.upstream '):
+                self.upstream = line[len('# branch.upstream '):]
+            elif line.startswith('# branch.ab '):
+                ahead, behind = line[len('# branch.ab '):].split()
+                self.ahead = int(ahead)
+                self.behind = -int(behind)
+            elif line[:2] in ('1 ', '2 ', 'u '):
+                # changed, renamed or copied, and unmerged entries have,
+                # respectively, 8, 9 and 10 fields before the path
+                fields = line.split(' ', {'1': 8, '2': 9, 'u': 10}[line[0]])
+                xy = fields[1].replace('.', ' ')
+                path = fields[-1]
+                if line[0] == '2':
+                    path, orig_path = path.split('\t')
+                    path = f'{orig_path} -> {path}'
+                if line[0] == 'u' or xy[1] != ' ':
+                    self.unstaged += 1
+                if line[0] != 'u' and xy[0] != ' ':
+                    self.staged += 1
+                self.files.append(f'{xy} {path}')
+            elif line.startswith('? '):
+                self.untracked += 1
+                self.files.append(f'?? {line[2:]}')
+            elif line.startswith('! '):
+                self.files.append(f'!! {line[2:]}')
+
+    def changes(self):
+        r'''
+        Return a string describing the number of commits that the branch is
+        ahead or behind its upstream branch, such as `ahead 2, behind 1`.
+        '''
+        return ', '.join(f'{change} {count}' for change, count in
+                         [('ahead', self.ahead), ('behind', self.behind)] if count > 0)
+
+    def __repr__(self):
+        """ define a __repr__ method for debugging """
+        return 'GitStatus({})'.format(', '.join(f'{slot}={getattr(self, slot)!r}' for slot in self.__slots__))
+
+
 # ---------------------------------------------------------------------------
 class GitCat:
     r"""
@@ -450,19 +1783,45 @@ class GitCat:
 
     def __init__(self, options, settings):
         self.gitcatrc = options.catalogue
-        self.options = options
         self.prefix = options.prefix
+        self.set_options(options)
 
-        for opt in ['dry_run', 'quiet']:
-            setattr(self, opt, getattr(settings, opt))
-            if hasattr(options, opt):
-                setattr(self, opt, getattr(options, opt))
-            if hasattr(options, 'git_'+opt):
-                setattr(self, opt, getattr(self, opt) or getattr(options, 'git_'+opt))
+        # the outputs of the commands for each repository that are remembered
+        # by the daemon until the repository changes
+        self.memo = None
+
+        # maximum number of connections to each remote server
+        self.connections = settings.connections
+        self.host_connections = {}
 
         # read the catalogue from the rc file
         self.read_catalogue()
 
+        # number of repositories that are processed concurrently
+        try:
+            self.jobs = max(1, int(getattr(options, 'jobs', settings.jobs)))
+        except ValueError:
+            error_message(f'the number of jobs must be an integer, not {options.jobs}')
+        try:
+            self.connections = max(1, int(self.connections))
+            for host in self.host_connections:
+                self.host_connections[host] = max(1, int(self.host_connections[host]))
+        except ValueError:
+            error_message('the number of connections in the gitcatrc file must be an integer')
+
+        # limits on how long each git command, and the whole run, can take
+        try:
+            for limit in ['timeout', 'deadline']:
+                seconds = getattr(options, limit, None)
+                setattr(Git, limit, None if seconds is None else float(seconds))
+        except ValueError:
+            error_message('the timeout and deadline must be numbers of seconds')
+        if Git.deadline is not None:
+            Git.deadline += time.monotonic()
+        if Git.timeout is not None or Git.deadline is not None:
+            # kill any ssh processes started by git too when they time out
+            Git.new_session = True
+
         if options.moveto is not None:
             self.moveto(options.moveto)
         else:
@@ -475,7 +1834,8 @@ class GitCat:
 
             except AttributeError:
                 try:
-                    getattr(self, settings.command_alias[command])()
+                    getattr(self, settings.command_alias[command].replace('-', '_'))()
+                    bad_command = False
                 except KeyError:
                     # should not ever reach this branch as argparse should give
                     # a usage error first
@@ -488,41 +1848,204 @@ class GitCat:
                 error_message(f'unrecognised command: {command}')
 
 
+    def set_options(self, options):
+        r'''
+        Set the command line options to `options`, and the attributes of
+        git cat that depend on them
+        '''
+        self.options = options
+        for opt in ['dry_run', 'quiet']:
+            setattr(self, opt, getattr(settings, opt))
+            if hasattr(options, opt):
+                setattr(self, opt, getattr(options, opt))
+            if hasattr(options, 'git_'+opt):
+                setattr(self, opt, getattr(self, opt) or getattr(options, 'git_'+opt))
+
+        # the output format, and the name of the command for NDJSON records
+        self.output = Settings.OUTPUT = getattr(options, 'output', 'text')
+        self.command = settings.command_alias.get(options.command, options.command)
+
+    def catalogue_command(self, command, *args, network=None, remote=None):
+        r'''
+        Run `command(rep, *args)` on each of the selected repositories in the
+        catalogue using up to `self.jobs` worker threads. The messages for
+        each repository are buffered and printed in catalogue order.
+
+        If the command talks to the remote repositories then `network`
+        describes the operation, for use in error messages. The
+        repositories in `remote`, which defaults to the installed
+        repositories, whose remote servers cannot be reached are skipped,
+        and one ssh connection to each remote server is shared by all of
+        the repositories on that server.
+        '''
+        reps = list(self.repositories())
+        if network is not None:
+            installed = remote
+            if installed is None:
+                installed = [rep for rep in reps if self.is_git_repository(self.catalogue[rep].path)]
+            unreachable = self.connected_to_remotes(network, installed)
+            if unreachable is None:
+                return
+
+            def network_command(rep, *args):
+                if rep in unreachable:
+                    record(unreachable=unreachable[rep])
+                    self.rep_message(rep, f'unable to reach {unreachable[rep]}', quiet=False)
+                else:
+                    command(rep, *args)
+
+            # limit the number of connections to each remote server
+            hosts = {rep: self.catalogue[rep].host for rep in reps}
+            with SSHConnections(self.catalogue[rep].url for rep in installed if rep not in unreachable):
+                self.run_catalogue_command(hosts, network_command, *args)
+        else:
+            self.run_catalogue_command(dict.fromkeys(reps), command, *args)
+
+    def run_catalogue_command(self, hosts, command, *args):
+        r'''
+        Run `command(rep, *args)` on the repositories in the dictionary
+        `hosts`, which maps each repository to its remote server, using up to
+        `self.jobs` worker threads. The repositories are scheduled by a
+        `HostScheduler` so that the limits on the number of connections to
+        each server are respected, and their output is printed by a
+        `Renderer`. The repositories are processed one at a time, without
+        a progress line, if there is only one job as then git can prompt
+        for passwords.
+        '''
+        if self.jobs == 1 or len(hosts) < 2:
+            for rep in hosts:
+                if self.output == 'text' and self.memo is None:
+                    command(rep, *args)
+                else:
+                    write(self.run_repository(command, rep, *args), '')
+                    sys.stdout.flush()
+            return
+
+        from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+        scheduler = HostScheduler(hosts, self.connections, self.host_connections)
+        results = {rep: Future() for rep in hosts}
+
+        def worker():
+            while not Git.cancelled.is_set():
+                job = scheduler.next()
+                if job is None:
+                    return
+                rep, host = job
+                try:
+                    results[rep].set_result(self.run_repository(command, rep, *args))
+                except BaseException as err:
+                    results[rep].set_exception(err)
+                finally:
+                    scheduler.done(host)
+
+        pool = ThreadPoolExecutor(max_workers=min(self.jobs, len(hosts)))
+        sys.stdout.flush()
+        renderer = Renderer(hosts, ordered=self.output == 'text')
+        try:
+            for _ in range(min(self.jobs, len(hosts))):
+                pool.submit(worker)
+            finished = {results[rep]: rep for rep in hosts}
+            for result in as_completed(finished):
+                renderer.result(finished[result], result.result())
+        except BaseException:
+            # stop the remaining repositories and kill any running git commands
+            scheduler.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+            Git.terminate_all()
+            raise
+        finally:
+            renderer.close()
+        pool.shutdown()
+
+    def run_repository(self, command, rep, *args):
+        r'''
+        Run `command(rep, *args)` and return its buffered output. With
+        `--output ndjson`, the output is instead a JSON object, on one line,
+        that records the results for the repository.
+
+        In the daemon, the output is remembered, and reused, until the
+        repository changes.
+        '''
+        memo = None if self.memo is None else self.memo.get(rep)
+        if memo is not None:
+            key = (command.__name__, repr(args), self.quiet, self.max, self.output)
+            if key in memo:
+                return memo[key]
+
+        output_buffer.lines = []
+        output_buffer.record = None if self.output == 'text' else dict(
+            repository=rep,
+            command=self.command,
+            returncode=0,
+            duration=None,
+            ahead=None,
+            behind=None,
+            staged=None,
+            unstaged=None,
+            untracked=None,
+            message='',
+            stderr='',
+        )
+        start = time.perf_counter()
+        try:
+            command(rep, *args)
+            output = ''.join(output_buffer.lines)
+            if output_buffer.record is not None:
+                import json
+                output_buffer.record.update(duration=round(time.perf_counter() - start, 3),
+                                            message=output.rstrip('\n'))
+                output = json.dumps(output_buffer.record) + '\n'
+            if memo is not None:
+                memo[key] = output
+            return output
+        finally:
+            output_buffer.lines = output_buffer.record = None
+
     @staticmethod
-    def changed_files(rep):
+    def changed_files(rep, dire=None):
         r'''
-        Return list of files repository in the current directory that have
-        changed.  We assume that we are in a git repository.
+        Return list of files repository in the directory `dire` that have
+        changed.  We assume that `dire` is a git repository.
         '''
-        return Git(rep, 'diff-index', '--name-only HEAD')
+        return Git(rep, 'diff-index', ['--name-only', 'HEAD'], cwd=dire)
 
     def commit_repository(self, rep):
         r'''
-        Commit the files in the repository in current working directory.
-        The commit message is a list of the files being changed. Return
-        the Git() record of the commit.
+        Commit the files in the repository `rep`. The commit message is a list
+        of the files being changed. Return the Git() record of the commit.
         '''
         debugging('\nCOMMIT rep=' + rep)
-        changed_files = self.changed_files(rep)
+        dire = self.catalogue[rep].path
+        changed_files = self.changed_files(rep, dire)
         if changed_files and changed_files.output != '':
+            record(committed=len(changed_files.stdout.splitlines()))
             commit_message = 'git cat: updating ' + changed_files.output
-            options = f'--all --message="{commit_message}"'
+            options = ['--all', f'--message={commit_message}']
             if self.dry_run:
-                options += ' --porcelain' # implies --dry-run
-            return Git(rep, 'commit', options)
+                options.append('--porcelain') # implies --dry-run
+            return Git(rep, 'commit', options, cwd=dire)
 
         return changed_files
 
-    def connected_to_internet(self, operation):
+    def connected_to_remotes(self, operation, reps):
         r'''
-        If we are connected to the internet then return `True`. Otherwise print
-        and error message and exit.
+        Return a dictionary of the repositories in `reps` whose remote
+        servers cannot be reached, with the servers as values. If none of the
+        repositories can be reached then print an error message and return
+        `None`. Reachability is cached for `settings.reachable_ttl` seconds.
         '''
-        if connected_to_internet():
-            return True
-
-        print(f'Unable to {operation}. Please check your internet connection')
-        return False
+        addresses = {rep: remote_address(self.catalogue[rep].url) for rep in reps}
+        addresses = {rep: address for rep, address in addresses.items() if address is not None}
+        if addresses == {}:
+            return {}
+
+        ok = reachable(addresses.values(), os.path.join(settings.cache_dir, 'reachable.json'),
+                       int(settings.reachable_ttl))
+        unreachable = {rep: address[1].split('@')[-1] for rep, address in addresses.items() if not ok[address]}
+        if len(unreachable) == len(reps):
+            print(f'Unable to {operation}. Please check your internet connection', file=diagnostics())
+            return None
+        return unreachable
 
     def expand_path(self, dire):
         r'''
@@ -542,30 +2065,19 @@ class GitCat:
             dire = self.short_path(os.getcwd())
         dire = self.expand_path(dire)
 
-        if not (os.path.isdir(dire) and self.is_git_repository(dire)):
+        # find the root directory for the repository by searching up the
+        # directory tree
+        root = git_root(dire) if os.path.isdir(dire) else None
+        if root is None:
             error_message(f'{dire} not a git repository')
-
-        # find the root directory for the repository and the remote URL`
-        os.chdir(dire)
-        root = Git(dire, 'root')
-        if not root:
-            error_message(f'{dire} is not a git repository:\n  {root.output}')
         return root
 
     def is_git_repository(self, dire):
         r'''
-        Return `True` if `dire` is a git repository and `False` otherwise. As
-        part of testing for a repository the current working directory is also
-        changed to `dire`.
+        Return `True` if `dire` is a git repository and `False` otherwise.
         '''
         debugging(f'\nCHECKING for git dire={dire}')
-        if os.path.isdir(dire):
-            os.chdir(dire)
-            rep = dire.replace(self.prefix + '/', '')
-            is_git = Git(rep, 'rev-parse', '--is-inside-work-tree')
-            return is_git.returncode == 0 and 'true' in is_git.output
-
-        return False
+        return os.path.isdir(dire) and git_root(dire) is not None
 
     def list_catalogue(self, listing):
         r'''
@@ -575,61 +2087,60 @@ class GitCat:
         '''
         return '\n'.join('{dire:<{max}} {sep} {rep}'.format(
             dire=dire,
-            rep=self.catalogue[dire],
+            rep=' '.join([self.catalogue[dire].url, *self.catalogue[dire].labels()]),
             sep='=' if listing or self.
-            is_git_repository(self.expand_path(dire)) else '!',
+            is_git_repository(self.catalogue[dire].path) else '!',
             max=self.max) for dire in self.repositories())
 
     def moveto(self, position):
         r'''
         Move current repository to position `moveto` in the catalogue
         '''
-        dire = self.get_current_git_root()
-        rep = Git(dire, 'remote', 'get-url --push origin')
+        root = self.get_current_git_root()
+        dire = self.short_path(root)
+        rep = Git(dire, 'remote', ['get-url', '--push', 'origin'], cwd=root)
         if not rep:
             error_message(f'Unable to find remote repository for {dire}')
-        dire = self.short_path(dire.output.strip())
         if dire in self.catalogue:
-            # as is usual in python, negatives count backwards
-            if position<0:
-                position += len(self.catalogue.keys())
-            reps = list(self.catalogue.keys())
-            dire_pos = reps.index(dire)
-            if dire_pos != position:
-                # make a copy of the catalogue and then recreate it
-                cat = self.catalogue.copy()
-                self.catalogue = {}
-                pos = 0
-                delta = 0
-                for pos in range(len(cat.keys())):
-                    if pos == position:
-                        self.catalogue[dire] = cat[dire]
-                        delta = -1 if position<dire_pos else 0
-                    else:
-                        self.catalogue[reps[pos+delta]] = cat[reps[pos+delta]]
-                    if pos == dire_pos:
-                        delta = 1 if position>dire_pos else 0
+            if self.move_repository(dire, position):
                 self.save_catalogue()
         else:
             error_message(f'The git repository {dire} is not in the catalogue')
 
-    def process_options(self, default_options=''):
+    def move_repository(self, dire, position):
         r'''
-           Set the command line options starting with `default_options` and
-           then checking the command list options against the list of options
-           in `options_list`
+        Move the repository `dire` to position `position` in the catalogue,
+        where, as is usual in python, negative positions count backwards.
+        Return `True` if the order of the catalogue changed.
         '''
-        options = default_options
+        reps = list(self.catalogue)
+        if position < 0:
+            position += len(reps)
+        dire_pos = reps.index(dire)
+        if dire_pos == position:
+            return False
+        reps.insert(position, reps.pop(dire_pos))
+        self.catalogue = {rep: self.catalogue[rep] for rep in reps}
+        return True
+
+    def process_options(self, default_options=(), exclude=()):
+        r'''
+           Return the list of command line options for git starting with
+           `default_options` and then checking the command list options
+           against the list of options in `options_list`. The options in
+           `exclude` are used by git cat and are not passed to git.
+        '''
+        options = list(default_options)
         for option in vars(self.options):
-            if option.startswith('git_'):
+            if option.startswith('git_') and option not in exclude:
                 opt = option[4:].replace('_', '-')
                 val = getattr(self.options, option)
                 if val is True:
-                    options += ' --' + opt
+                    options.append('--' + opt)
                 elif isinstance(val, list):
-                    options += ' --{}={}'.format(opt, ','.join(val))
-                elif isinstance(val, str):
-                    options += ' --{}={}'.format(opt, val)
+                    options.append('--{}={}'.format(opt, ','.join(val)))
+                elif isinstance(val, (int, str)) and not isinstance(val, bool):
+                    options.append('--{}={}'.format(opt, val))
                 else:
                     debugging(f'option {option}={val} ignored')
         return options
@@ -643,14 +2154,43 @@ class GitCat:
            directory2 = repository2
            ...
 
-        and then put into the dictionary self.catalogue with the directory as
-        the key. Any lines that do not contain an equal sign are ignored.
+        and then put into the dictionary self.catalogue, of `Repository`
+        records, with the directory as the key. Any lines that do not contain
+        an equal sign are ignored.
+
+        The parsed catalogue is cached in the cache directory, so the
+        gitcatrc file is only read again when its modification time or size
+        changes.
         '''
-        self.catalogue = {}
+        cached = load_cache(self.catalogue_cache_file(), self.catalogue_cache_key())
+        if cached is None:
+            self.parse_catalogue()
+        else:
+            self.rc_settings, self.catalogue, self.groups, self.max = cached
+            self.apply_settings()
+
+        # set the maximum length of a catalogue key if it depends on the filter
+        if self.selectors() != ([], []):
+            self.set_max()
+
+    def set_max(self):
+        r'''
+        Set `self.max` to the maximum length of the keys of the selected
+        repositories, plus one, which is used to align the output
+        '''
+        self.max = max((len(dire) + 1 for dire in self.repositories()), default=0)
+
+    def parse_catalogue(self):
+        r'''
+        Parse the gitcatrc file, apply the settings in it and then cache the
+        catalogue.
+        '''
+        self.rc_settings = {}  # settings from the gitcatrc file
+        catalogue = {}
         try:
             reading_settings = True
-            with open(self.gitcatrc, 'r') as catalogue:
-                for line in catalogue:
+            with open(self.gitcatrc, 'r') as gitcatrc:
+                for line in gitcatrc:
                     if line.strip() == 'Catalogue:':
                         reading_settings = False
 
@@ -659,27 +2199,77 @@ class GitCat:
                         dire = dire.strip()
                         rep = rep.strip()
                         if reading_settings:
-                            if hasattr(self, dire):
-                                setattr(self, dire, rep)
-                            elif hasattr(self.options, dire):
-                                setattr(self.options, dire, rep)
-                            else:
-                                self.message(f'bad setting "{dire}" in gitcatrc file')
+                            self.rc_settings[dire] = rep
 
                         else:
-                            if dire in self.catalogue:
+                            if dire in catalogue:
                                 error_message(f'{dire} appears in the catalogue more than once!')
                             else:
-                                self.catalogue[dire] = rep.strip()
+                                # the URL can be followed by options for git
+                                # clone and by @group labels
+                                catalogue[dire] = rep.split() or ['']
 
         except (FileNotFoundError, OSError):
             error_message(f'there was a problem reading the catalogue file {self.gitcatrc}')
 
-        # set the maximum length of a catalogue key
+        # the settings can change the prefix, so apply them first
+        self.apply_settings()
+        self.catalogue = {}
+        for dire, (url, *labels) in catalogue.items():
+            self.catalogue[dire] = Repository(dire, self.expand_path(dire), url,
+                                              [label for label in labels if not label.startswith('@')],
+                                              [label[1:] for label in labels if label.startswith('@')])
+        self.save_catalogue_cache()
+
+    def apply_settings(self):
+        r'''
+        Apply the settings from the gitcatrc file. The settings for command
+        line options, such as `jobs` and `timeout`, are only applied to the
+        options that are not given on the command line.
+        '''
+        defaults = getattr(self.options, 'defaults', {})
+        for key, val in self.rc_settings.items():
+            if key.startswith('connections.'):
+                self.host_connections[key[len('connections.'):]] = val
+            elif hasattr(self, key):
+                setattr(self, key, val)
+            elif hasattr(self.options, key):
+                if getattr(self.options, key) == defaults.get(key, getattr(self.options, key)):
+                    setattr(self.options, key, val)
+            else:
+                self.message(f'bad setting "{key}" in gitcatrc file')
+
+    def catalogue_cache_file(self):
+        r''' Return the name of the file that caches the parsed catalogue '''
+        return os.path.join(settings.cache_dir, 'catalogue.pickle')
+
+    def catalogue_cache_key(self):
+        r'''
+        Return the key for the cached catalogue, which changes whenever the
+        gitcatrc file or the prefix given on the command line changes.
+        '''
         try:
-            self.max = max(len(dire) for dire in self.repositories()) + 1
-        except ValueError:
-            self.max = 0
+            stat = os.stat(self.gitcatrc)
+        except OSError:
+            return None
+        return (os.path.abspath(self.gitcatrc), stat.st_mtime_ns, stat.st_size, self.options.prefix,
+                Repository.__slots__)
+
+    def save_catalogue_cache(self):
+        r'''
+        Cache the parsed catalogue together with the index of the groups and
+        the maximum length of a key. The index maps each group to the
+        positions in the catalogue, and the keys, of its repositories, so
+        that groups are selected without looking at the other repositories.
+        '''
+        self.max = max((len(dire) + 1 for dire in self.catalogue), default=0)
+        self.groups = collections.defaultdict(list)
+        for position, rep in enumerate(self.catalogue.values()):
+            for group in rep.groups:
+                self.groups[group].append((position, rep.key))
+        self.groups = dict(self.groups)
+        save_cache(self.catalogue_cache_file(), self.catalogue_cache_key(),
+                   (self.rc_settings, self.catalogue, self.groups, self.max))
 
     def save_catalogue(self):
         r'''
@@ -689,7 +2279,9 @@ class GitCat:
             catalogue.write('# List of git repositories to sync using gitcat\n')
             catalogue.write('# Do not remove the "Catalogue:" line below!\n')
             catalogue.write(settings.save_settings())
+            catalogue.write(''.join(f'{key} = {val}\n' for key, val in self.rc_settings.items()))
             catalogue.write('Catalogue:\n'+self.list_catalogue(listing=True) + '\n')
+        self.save_catalogue_cache()
 
     def short_path(self, dire):
         r'''
@@ -702,16 +2294,61 @@ class GitCat:
         return dire[len(self.prefix) + 1:] if dire.startswith(
             self.prefix) else dire
 
+    def selectors(self):
+        r'''
+        Return the lists of the selectors for the repositories to include and
+        to exclude, which are regular expressions and @groups
+        '''
+        include = getattr(self.options, 'repositories', [])
+        if isinstance(include, str):
+            include = [include] if include != '' else []
+        return include, getattr(self.options, 'exclude', None) or []
+
+    def group_members(self, group):
+        r'''
+        Return the list of pairs of positions in the catalogue and keys of the
+        repositories in `group`, using the index of the groups
+        '''
+        try:
+            return self.groups[group]
+        except KeyError:
+            error_message(f'there is no group @{group} in the catalogue. The groups are: '
+                          + ', '.join('@' + name for name in sorted(self.groups)))
+
     def repositories(self):
         ''' return the list of repositories to iterate over by
-            filtering by options.repositories
+            selecting those given by options.repositories and then removing
+            those given by options.exclude
         '''
+        include, exclude = self.selectors()
         # if there is no filter then return the catalogue keys
-        if not hasattr(self.options, 'repositories'):
+        if include == [] and exclude == []:
             return self.catalogue.keys()
 
-        repositories = re.compile(self.options.repositories)
-        return filter(repositories.search, self.catalogue.keys())
+        # the groups are found using the index, and only the regular
+        # expressions need to be searched for in the catalogue
+        groups = [selector[1:] for selector in include if selector.startswith('@')]
+        patterns = [selector for selector in include if not selector.startswith('@')]
+        if include == [] or patterns != []:
+            members = {rep for group in groups for _, rep in self.group_members(group)}
+            search = re.compile('|'.join(f'(?:{pattern})' for pattern in patterns)).search if patterns else None
+            candidates = [rep for rep in self.catalogue
+                          if search is None or rep in members or search(rep)]
+        elif len(groups) == 1:
+            candidates = [rep for _, rep in self.group_members(groups[0])]
+        else:
+            # merge the groups in catalogue order, removing duplicates
+            import heapq
+            candidates = list(dict.fromkeys(
+                rep for _, rep in heapq.merge(*(self.group_members(group) for group in groups))))
+
+        excluded = {rep for selector in exclude if selector.startswith('@')
+                    for _, rep in self.group_members(selector[1:])}
+        patterns = [selector for selector in exclude if not selector.startswith('@')]
+        if patterns:
+            search = re.compile('|'.join(f'(?:{pattern})' for pattern in patterns)).search
+            return [rep for rep in candidates if rep not in excluded and not search(rep)]
+        return [rep for rep in candidates if rep not in excluded]
 
     # ---------------------------------------------------------------------------
     # messages
@@ -721,10 +2358,15 @@ class GitCat:
         r'''
         If `self.quiet` is `True` then print `message` to stdout, with `ending`
         as the, well, ending. If `self.quiet` is `False` then do nothing.
+        With `--output ndjson`, messages that are not part of the record of a
+        repository are printed to stderr.
         '''
         if not self.quiet:
             debugging('-' * 40)
-            print(message, end=ending)
+            if self.output == 'ndjson' and getattr(output_buffer, 'record', None) is None:
+                print(message, end='\n' if ending is None else ending, file=sys.stderr)
+            else:
+                write(message, ending)
             debugging('-' * 40)
 
     def quiet_message(self, message, ending=None):
@@ -734,7 +2376,7 @@ class GitCat:
         '''
         if self.quiet:
             debugging('-' * 40)
-            print(message, end=ending)
+            write(message, ending)
             debugging('-' * 40)
 
     def rep_message(self, rep, message='', quiet=True, ending=None):
@@ -745,9 +2387,10 @@ class GitCat:
         debugging(
             'rep message: quiet={}, self.quiet={} and quietness={}\n{}'.format(
                 quiet, self.quiet, not (quiet and self.quiet), '-' * 40))
-        if not (quiet and self.quiet):
-            print('{:<{max}} {}'.format(rep, message, max=self.max),
-                  end=ending)
+        if getattr(output_buffer, 'record', None) is not None:
+            write(message, ending)  # the repository is part of the record
+        elif not (quiet and self.quiet):
+            write('{:<{max}} {}'.format(rep, message, max=self.max), ending)
             debugging('-' * 40)
 
     # ---------------------------------------------------------------------------
@@ -767,20 +2410,20 @@ class GitCat:
         Example:
             > git cat add  # add the current directory to the catalogue
         '''
-        dire = self.get_current_git_root()
+        root = self.get_current_git_root()
+        dire = self.short_path(root)
 
-        rep = Git(dire, 'remote', 'get-url --push origin')
+        rep = Git(dire, 'remote', ['get-url', '--push', 'origin'], cwd=root)
         if not rep:
             error_message(f'Unable to find remote repository for {dire}')
 
-        dire = self.short_path(dire.output.strip())
         rep = rep.output.strip()
         if dire in self.catalogue:
             # give an error if repository is already in the catalogue
             error_message(f'the git repository in {dire} is already in the catalogue')
         else:
             # add current directory to the repository and save
-            self.catalogue[dire] = rep
+            self.catalogue[dire] = Repository(dire, root, rep)
             self.save_catalogue()
             self.message(f'Adding {dire} to the catalogue')
 
@@ -788,7 +2431,7 @@ class GitCat:
             # add a commit message
             catdir = os.path.dirname(self.gitcatrc)
             if self.is_git_repository(catdir):
-                Git(dire, 'commit', '--all --message="{}"'.format(f'Adding {dire} to gitcatrc'))
+                Git(dire, 'commit', ['--all', f'--message=Adding {dire} to gitcatrc'], cwd=catdir)
 
     def branch(self):
         r'''
@@ -811,24 +2454,25 @@ class GitCat:
             Code/Project6            already up to date
 
         '''
-        if self.connected_to_internet('check status of branches'):
+        options = self.process_options(['--verbose'])
+        self.catalogue_command(self.branch_repository, options)
 
-            # need to use -q to stop output being printed to stderr, but then we
-            # have to work harder to extract information about the pull
-            options = self.process_options('--verbose')
-            for rep in self.repositories():
-                debugging('\nBRANCH ' + rep)
-                dire = self.expand_path(rep)
-                if self.is_git_repository(dire):
-                    pull = Git(rep, 'branch', options)
-                    if pull:
-                        if '\n' not in pull.output:
-                            self.rep_message(rep, 'already up to date')
-                        else:
-                            self.rep_message(rep,
-                                             pull.output[pull.output.index('\n'):])
+    def branch_repository(self, rep, options):
+        r'''
+        Run `git branch` on the repository `rep`
+        '''
+        debugging('\nBRANCH ' + rep)
+        dire = self.catalogue[rep].path
+        if self.is_git_repository(dire):
+            pull = Git(rep, 'branch', options, cwd=dire)
+            if pull:
+                if '\n' not in pull.output:
+                    self.rep_message(rep, 'already up to date')
                 else:
-                    self.rep_message(rep, 'not on system')
+                    self.rep_message(rep,
+                                     pull.output[pull.output.index('\n'):])
+        else:
+            self.rep_message(rep, 'not on system')
 
     def ls(self):
         r'''
@@ -846,7 +2490,13 @@ class GitCat:
             Stuff          = git@some.random.rep.com:Me/stuffing.git
 
         '''
-        print(self.list_catalogue(listing=False))
+        if self.output == 'ndjson':
+            import json
+            for dire in self.repositories():
+                print(json.dumps(dict(repository=dire, command='ls', url=self.catalogue[dire].url,
+                                      installed=self.is_git_repository(self.catalogue[dire].path))))
+        else:
+            print(self.list_catalogue(listing=False))
 
     def commit(self):
         r'''
@@ -858,13 +2508,16 @@ class GitCat:
         Example:
             > git cat commit
         '''
-        if self.connected_to_internet('commit repositories'):
+        self.catalogue_command(self.commit_catalogue_repository)
 
-            for rep in self.repositories():
-                debugging('\nCOMMITTING ' + rep)
-                dire = self.expand_path(rep)
-                if self.is_git_repository(dire):
-                    self.commit_repository(rep)
+    def commit_catalogue_repository(self, rep):
+        r'''
+        Commit all changes in the repository `rep` if it is installed
+        '''
+        debugging('\nCOMMITTING ' + rep)
+        dire = self.catalogue[rep].path
+        if self.is_git_repository(dire):
+            self.commit_repository(rep)
 
     def diff(self):
         r'''
@@ -883,26 +2536,123 @@ class GitCat:
             @@ -29,16 +29,25 @@ Examples:
             -gitcatrc:
             +The gitcatrc file:
+
+        With --stream, the diffs are printed as git prints them, without
+        waiting for each repository to finish, and so without keeping them
+        in memory. On a terminal the diffs of all of the repositories are
+        shown in one pager, which is given by $GIT_PAGER or $PAGER. With
+        --stat, the total number of repositories, files and lines that have
+        changed is printed at the end, which implies --stream.
+
+        With `--output ndjson` the diffs are never streamed, and --stat adds
+        the counts to the record of each repository and prints the total to
+        stderr.
         '''
-        if self.connected_to_internet('diff repositories'):
-
-            options = self.process_options()
-            options += ' HEAD'
-            for rep in self.repositories():
-                debugging('\nDIFFING ' + rep)
-                dire = self.expand_path(rep)
-                if self.is_git_repository(dire):
-                    diff = Git(rep, 'diff', options)
-                    if diff:
-                        if diff.output != '':
-                            self.rep_message(rep, diff.output.lstrip(), quiet=False)
-                        else:
-                            self.rep_message(rep, 'up to date')
+        options = self.process_options(exclude=['git_stream', 'git_stat'])
+        options.append('HEAD')
+        if self.options.git_stat and len(options) > 1:
+            error_message('--stat needs the patches so cannot be used with the other diff options')
+        self.diff_total = None
+        if self.output == 'text' and (self.options.git_stream or self.options.git_stat):
+            self.stream_diff(options)
+        else:
+            if self.options.git_stat:
+                self.diff_total = DiffStat()
+            self.catalogue_command(self.diff_repository, options)
+            if self.diff_total is not None:
+                self.message(f'{self.diff_total}')
+
+    def stream_diff(self, options):
+        r'''
+        Run `git diff` with `options` on each repository in turn, streaming
+        the output into a pager when stdout is a terminal
+        '''
+        import io
+        from contextlib import redirect_stdout
+        pager = None
+        command = os.environ.get('GIT_PAGER', os.environ.get('PAGER', 'less'))
+        if sys.stdout.isatty() and command not in ('', 'cat'):
+            pager = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE,
+                                     env=dict(os.environ, LESS=os.environ.get('LESS', 'FRX')))
+            out = io.TextIOWrapper(pager.stdin, write_through=True)
+        else:
+            out = sys.stdout
+
+        total = DiffStat() if self.options.git_stat else None
+        try:
+            with redirect_stdout(out):
+                for rep in self.repositories():
+                    self.stream_repository(rep, options, total)
+                if total is not None:
+                    self.message(f'{total}')
+                out.flush()
+        except BrokenPipeError:
+            pass  # the pager was closed
+        finally:
+            if pager is not None:
+                try:
+                    pager.stdin.close()
+                except BrokenPipeError:
+                    pass
+                pager.wait()
+
+    def stream_repository(self, rep, options, total):
+        r'''
+        Run `git diff` on the repository `rep`, printing its output as soon
+        as git prints it and adding it to the `DiffStat` total, if this is
+        not `None`
+        '''
+        debugging('\nSTREAMING DIFF ' + rep)
+        dire = self.catalogue[rep].path
+        if not self.is_git_repository(dire):
+            return
+
+        changed = False
+        def stream(line):
+            nonlocal changed
+            if not changed:
+                changed = True
+                self.rep_message(rep, 'changes', quiet=False)
+                if total is not None:
+                    total.repositories += 1
+                sys.stdout.flush()
+            sys.stdout.buffer.write(line)
+            if total is not None:
+                total.add(line)
+
+        diff = Git(rep, 'diff', options, cwd=dire, stream=stream)
+        if diff and not changed:
+            self.rep_message(rep, 'up to date')
+
+    def diff_repository(self, rep, options):
+        r'''
+        Run `git diff` on the repository `rep`
+        '''
+        debugging('\nDIFFING ' + rep)
+        dire = self.catalogue[rep].path
+        if self.is_git_repository(dire):
+            diff = Git(rep, 'diff', options, cwd=dire)
+            if diff:
+                if self.diff_total is not None and diff.stdout != '':
+                    stat = DiffStat()
+                    for line in diff.stdout.encode().splitlines():
+                        stat.add(line)
+                    record(files=stat.files, insertions=stat.insertions, deletions=stat.deletions)
+                    self.diff_total.merge(stat)
+                if diff.output != '':
+                    self.rep_message(rep, diff.output.lstrip(), quiet=False)
+                else:
+                    self.rep_message(rep, 'up to date')
 
     def fetch(self):
         r'''
         Run `git fetch -q --progress` on the installed git cat repositories.
 
+        The repositories are first checked using `git ls-remote`, which is
+        much faster than `git fetch`, and they are only fetched if the
+        branches or tags on their remote have changed. This check is skipped
+        when any of the options, such as --tags or --prune, are given.
+
         Example:
             > git cat fetch
             Rep1  already up to date
@@ -915,22 +2665,87 @@ class GitCat:
               remote: Total 3 (delta 2), reused 0 (delta 0)
 
         '''
-        if self.connected_to_internet('fetch repositories'):
-            # need to use -q to stop output being printed to stderr, but then we
-            # have to work harder to extract information about the pull
-            options = self.process_options('-q --progress')
-            for rep in self.repositories():
-                debugging('\nFETCHING ' + rep)
-                dire = self.expand_path(rep)
-                if self.is_git_repository(dire):
-                    pull = Git(rep, 'fetch', options)
-                    if pull:
-                        if pull.output == '':
-                            self.rep_message(rep, 'already up to date')
-                        else:
-                            self.rep_message(rep, pull.output.lstrip())
+        # need to use -q to stop output being printed to stderr, but then we
+        # have to work harder to extract information about the pull
+        options = self.process_options(['-q', '--progress'])
+        self.catalogue_command(self.fetch_repository, options, network='fetch repositories')
+
+    def fetch_repository(self, rep, options):
+        r'''
+        Run `git fetch` on the repository `rep`
+        '''
+        debugging('\nFETCHING ' + rep)
+        dire = self.catalogue[rep].path
+        if self.is_git_repository(dire):
+            unchanged = self.remote_unchanged(rep, dire, options)
+            if unchanged is not False:
+                if unchanged:
+                    self.rep_message(rep, 'already up to date')
+                return
+
+            pull = Git(rep, 'fetch', options, cwd=dire)
+            if pull:
+                if pull.output == '':
+                    self.rep_message(rep, 'already up to date')
                 else:
-                    self.rep_message(rep, 'not on system')
+                    self.rep_message(rep, pull.output.lstrip())
+        else:
+            self.rep_message(rep, 'not on system')
+
+    def remote_unchanged(self, rep, dire, options, pulling=False):
+        r'''
+        Return `True` if the branches advertised by `git ls-remote` for the
+        remote of the current branch of the repository `rep` in `dire` are
+        the same as its remote-tracking branches, and every advertised tag is
+        already in the repository, so that fetching would not change
+        anything. When `pulling`, the current branch must also have the same
+        tip as its upstream branch, as otherwise `git pull` would still
+        merge. This is much faster than a fetch that does nothing.
+
+        Return `False` if the remote has changed or this cannot be decided,
+        such as when any option other than the defaults `-q --progress` is
+        given, when the current branch has no upstream branch or when the
+        remote does not use the default refspec. Return `None` if `git
+        ls-remote` fails, because git has already reported the error.
+        '''
+        # options such as --tags, --prune, --force and --dry-run change what
+        # git does, so git must always be run for them
+        if any(option not in ('-q', '--progress') for option in options):
+            return False
+
+        git_dir = git_directory(dire)
+        common_dir = common_directory(git_dir)
+        upstreams = branch_upstreams(common_dir)
+        if upstreams is None:
+            return False
+        refs = read_refs(common_dir)
+
+        try:
+            with open(os.path.join(git_dir, 'HEAD'), 'r') as head_file:
+                head = head_file.readline().strip()
+        except OSError:
+            return False
+        head = head[len('ref:'):].strip() if head.startswith('ref:') else None
+        upstream = upstreams.get(head)
+        if upstream is None or not upstream.startswith('refs/remotes/'):
+            return False
+        if pulling and refs.get(head) != refs.get(upstream):
+            return False
+        remote = upstream.split('/')[2]
+
+        ls_remote = Git(rep, 'ls-remote', ['--heads', '--tags', remote], cwd=dire)
+        if not ls_remote:
+            return None
+        for line in ls_remote.stdout.splitlines():
+            sha, ref = line.split()
+            if ref.startswith('refs/heads/'):
+                if refs.get(f'refs/remotes/{remote}/' + ref[len('refs/heads/'):]) != sha:
+                    return False
+            elif not ref.endswith('^{}') and refs.get(ref) != sha:
+                # fetch follows new tags even when no branch has changed
+                return False
+        debugging(f'{rep}: remote {remote} has not changed')
+        return True
 
     def install(self):
         r'''
@@ -941,53 +2756,95 @@ class GitCat:
 
         By default all repositories are installed, however, by specifying a
         regular expression for the repositories you can install a subset of the
-        repositories managed by git cat.abs
+        repositories managed by git cat. The repositories are cloned
+        concurrently, using up to --jobs clones at once.
+
+        The options --filter, --depth and --sparse are passed to `git clone`
+        to make partial, shallow and sparse clones. These options can also be
+        given for each repository by adding them after its URL in the
+        gitcatrc file, such as:
+
+            Code/Huge = git@github.com:AndrewMathas/huge.git --filter=blob:none
+
+        With --reference, a repository is cloned using the objects of an
+        installed repository in the catalogue with the same name, such as a
+        fork of the same project, so only the missing objects are downloaded.
+        The new repository then depends on the installed repository, so this
+        should not be deleted.
 
         Examples:
 
             > git cat install       # install all repositories managed by git cat
             > git cat install Code  # install all "Code" repositories managed by git cat
         '''
-        if self.connected_to_internet('install new repositories'):
-
-            installed_something = False
-            for rep in self.repositories():
-                debugging('\nINSTALLING ' + rep)
-                dire = self.expand_path(rep)
-                if os.path.exists(dire):
-                    if os.path.exists(os.path.join(dire, '.git')):
-                        self.rep_message(f'git repository {dire} already exists')
-                    else:
-                        # initialise current repository and fetch from remote
-                        Git(rep, 'init')
-                        Git(rep, f'remote add origin {self.catalogue[rep]}')
-                        Git(rep, 'fetch origin')
-                        Git(rep, 'checkout -b master --track origin/master')
-                        installed_something = True
+        reps = list(self.repositories())
+        missing = [rep for rep in reps if not os.path.exists(os.path.join(self.catalogue[rep].path, '.git'))]
+
+        # installed repositories that can be used as references when cloning
+        self.references = {}
+        if self.options.git_reference:
+            for rep in self.catalogue:
+                if rep not in missing and self.is_git_repository(self.catalogue[rep].path):
+                    self.references.setdefault(project_name(self.catalogue[rep].url), self.catalogue[rep].path)
+
+        self.installed = []
+        clone_options = self.process_options(['--quiet'], exclude=['git_dry_run', 'git_reference'])
+        self.catalogue_command(self.install_repository, clone_options,
+                               network='install new repositories', remote=missing)
+        git_root.cache_clear() # the catalogue may now contain new repositories
+
+        if self.installed == [] and not self.dry_run:
+            error_message('No matching repositories found to install')
+
+    def install_repository(self, rep, clone_options):
+        r'''
+        Install the repository `rep`, if it is not already installed, by
+        cloning it using `clone_options` together with the options for the
+        repository in the catalogue
+        '''
+        debugging('\nINSTALLING ' + rep)
+        repository = self.catalogue[rep]
+        dire = repository.path
+        if os.path.exists(os.path.join(dire, '.git')):
+            self.rep_message(rep, 'already installed')
+            return
+
+        options = [*clone_options, *repository.install]
+        reference = self.references.get(project_name(repository.url))
+        if reference is not None:
+            options += ['--reference-if-able', reference]
+
+        if self.dry_run:
+            self.rep_message(rep, 'installing (dry run)')
+
+        elif os.path.exists(dire):
+            # initialise current repository and fetch from remote
+            self.rep_message(rep, 'initialising')
+            depth = [opt for opt in options if opt.startswith('--depth')]
+            if (Git(rep, 'init', ['--quiet'], cwd=dire)
+                    and Git(rep, 'remote', ['add', 'origin', repository.url], cwd=dire)
+                    and Git(rep, 'fetch', ['--quiet', *depth, 'origin'], cwd=dire)
+                    and Git(rep, 'checkout', ['--quiet', '-b', 'master', '--track', 'origin/master'], cwd=dire)):
+                self.installed.append(rep)
 
-                else:
-                    self.rep_message(rep, 'installing')
-                    parent = os.path.dirname(dire)
-                    os.makedirs(parent, exist_ok=True)
-                    os.chdir(parent)
-                    if not self.dry_run:
-                        install = Git(rep, 'clone', f'--quiet {self.catalogue[rep]} {os.path.basename(dire)}')
-                        if install:
-                            installed_something = True
-                            self.message(' - done!')
-                if not (self.dry_run or self.is_git_repository(dire)):
-                    self.rep_message(rep, f'{rep} is not a git repository!?', quiet=False)
-
-            if not installed_something:
-                error_message('No matching repositories found to install')
+        else:
+            parent = os.path.dirname(dire)
+            os.makedirs(parent, exist_ok=True)
+            install = Git(rep, 'clone', [*options, repository.url, os.path.basename(dire)], cwd=parent)
+            if install:
+                self.installed.append(rep)
+                self.rep_message(rep, 'installed' if reference is None else f'installed using {self.short_path(reference)}')
 
+        if not (self.dry_run or os.path.isdir(os.path.join(dire, '.git'))):
+            self.rep_message(rep, f'{rep} is not a git repository!?', quiet=False)
 
     def pull(self):
         r'''
         Run through all repositories and update them if their directories
         already exist on this computer. Unless the  `--quiet` option is used,
         a message is printed to give the summarise the status of the
-        repository.
+        repository. As with fetch, the repositories whose remotes have not
+        changed, according to `git ls-remote`, are not pulled.
 
         Example:
             > git cat pull
@@ -999,28 +2856,37 @@ class GitCat:
             Notes/Life     already up to date
 
         '''
-        if self.connected_to_internet('pull repositories'):
+        # need to use -q to stop output being printed to stderr, but then we
+        # have to work harder to extract information about the pull
+        options = self.process_options(['-q', '--progress'])
+        self.catalogue_command(self.pull_repository, options, network='pull repositories')
 
-            # need to use -q to stop output being printed to stderr, but then we
-            # have to work harder to extract information about the pull
-            options = self.process_options('-q --progress')
-            for rep in self.repositories():
-                debugging('\nPULLING ' + rep)
-                dire = self.expand_path(rep)
-                if self.is_git_repository(dire):
-                    pull = Git(rep, 'pull', options)
-                    if pull:
-                        if pull.output == '':
-                            self.rep_message(rep, 'already up to date')
-                        else:
-                            self.rep_message(
-                                rep,
-                                'pulling\n' + '\n'.join(
-                                    lin for lin in pull.output.split('\n')
-                                    if 'Compressing' not in lin),
-                                quiet=False)
+    def pull_repository(self, rep, options):
+        r'''
+        Run `git pull` on the repository `rep`
+        '''
+        debugging('\nPULLING ' + rep)
+        dire = self.catalogue[rep].path
+        if self.is_git_repository(dire):
+            unchanged = self.remote_unchanged(rep, dire, options, pulling=True)
+            if unchanged is not False:
+                if unchanged:
+                    self.rep_message(rep, 'already up to date')
+                return
+
+            pull = Git(rep, 'pull', options, cwd=dire)
+            if pull:
+                if pull.output == '':
+                    self.rep_message(rep, 'already up to date')
                 else:
-                    self.rep_message(rep, 'repository not installed')
+                    self.rep_message(
+                        rep,
+                        'pulling\n' + '\n'.join(
+                            lin for lin in pull.output.split('\n')
+                            if 'Compressing' not in lin),
+                        quiet=False)
+        else:
+            self.rep_message(rep, 'repository not installed')
 
     def push(self):
         r'''
@@ -1048,40 +2914,86 @@ class GitCat:
             Notes/Life     up to date
 
         '''
-        if self.connected_to_internet('push repositories'):
-            debugging('\nPUSHING ')
-            options = self.process_options('--porcelain --follow-tags')
-            for rep in self.repositories():
-                debugging('\nPUSHING ' + rep)
-                dire = self.expand_path(rep)
-                if self.is_git_repository(dire):
-                    debugging('Continuing with push')
-                    commit = self.commit_repository(rep)
-                    if commit:
-                        if commit.output != '':
-                            self.rep_message(rep, 'commit\n' + commit.output)
-                        ahead = Git(rep, 'for-each-ref', r'--format="%(refname:short) %(upstream:track)" refs/heads')
-                        if ahead:
-                            if 'ahead' not in ahead.output:
-                                self.rep_message(rep, 'up to date')
-                            elif not self.dry_run:
-                                push = Git(rep, 'push', options)
-
-                                if push:
-                                    if push.output.startswith('  To ') and push.output.endswith('Done'):
-                                        if commit.output == '' and 'up to date' not in commit.output:
-                                            self.rep_message(rep, 'pushed\n' + push.output)
-                                        else:
-                                            self.message(
-                                                push.output.split('\n')[0])
-                                    else:
-                                        if commit.output == '' and 'up to date' not in commit.output:
-                                            self.rep_message(rep, 'pushed\n' + push.output)
-                                        else:
-                                            self.message(push.output)
+        debugging('\nPUSHING ')
+        options = self.process_options(['--porcelain', '--follow-tags'])
 
-                else:
-                    self.rep_message(rep, 'not on system')
+        # the fingerprints of the repositories that had nothing to push
+        cache_file = os.path.join(settings.cache_dir, 'push.pickle')
+        self.push_cache = load_cache(cache_file, 'push') or {}
+        self.catalogue_command(self.push_repository, options, network='push repositories')
+        save_cache(cache_file, 'push', self.push_cache)
+
+    def nothing_to_push(self, dire):
+        r'''
+        Return `True` if the repository in `dire` certainly has nothing to
+        commit or push, which is decided without running git. This is the
+        case when:
+         - the fingerprint of the repository is the same as the last time
+           that there was nothing to push, so the index and HEAD have not changed
+         - every branch with an upstream branch has the same tip as its
+           remote-tracking branch
+         - the stat data of the files in the index match the working tree
+        Otherwise, `False` is returned and git is used to decide.
+        '''
+        key = self.push_cache.get(dire)
+        if key is None or key != fingerprint(dire, fetch_head=False, work_tree=False):
+            return False
+
+        git_dir = git_directory(dire)
+        common_dir = common_directory(git_dir)
+        upstreams = branch_upstreams(common_dir)
+        if upstreams is None:
+            return False
+        refs = read_refs(common_dir)
+        if any(branch in refs and refs[branch] != refs.get(upstream) for branch, upstream in upstreams.items()):
+            return False
+
+        return index_matches_work_tree(dire, git_dir)
+
+    def push_repository(self, rep, options):
+        r'''
+        Commit any changes and then run `git push` on the repository `rep`
+        '''
+        debugging('\nPUSHING ' + rep)
+        dire = self.catalogue[rep].path
+        if self.is_git_repository(dire):
+            if self.nothing_to_push(dire):
+                debugging(f'nothing to push in {rep}')
+                record(ahead=0, behind=0)
+                self.rep_message(rep, 'up to date')
+                return
+
+            debugging('Continuing with push')
+            commit = self.commit_repository(rep)
+            if commit:
+                if commit.output != '':
+                    self.rep_message(rep, 'commit\n' + commit.output)
+                ahead = Git(rep, 'for-each-ref', ['--format=%(refname:short) %(upstream:track)', 'refs/heads'], cwd=dire)
+                if ahead:
+                    record(**{change: sum(int(count) for count in re.findall(change + r' ([0-9]+)', ahead.stdout))
+                              for change in ('ahead', 'behind')})
+                    if 'ahead' not in ahead.output:
+                        self.rep_message(rep, 'up to date')
+                        if commit.output == '':
+                            self.push_cache[dire] = fingerprint(dire, fetch_head=False, work_tree=False)
+                    elif not self.dry_run:
+                        push = Git(rep, 'push', options, cwd=dire)
+
+                        if push:
+                            if push.output.startswith('  To ') and push.output.endswith('Done'):
+                                if commit.output == '' and 'up to date' not in commit.output:
+                                    self.rep_message(rep, 'pushed\n' + push.output)
+                                else:
+                                    self.message(
+                                        push.output.split('\n')[0])
+                            else:
+                                if commit.output == '' and 'up to date' not in commit.output:
+                                    self.rep_message(rep, 'pushed\n' + push.output)
+                                else:
+                                    self.message(push.output)
+
+        else:
+            self.rep_message(rep, 'not on system')
 
     def remote_set_ssh(self):
         r'''
@@ -1103,33 +3015,36 @@ class GitCat:
             Code/Project2  changed to ssh access
             Code/Project3  unchanged
         '''
-        if self.connected_to_internet('change ssh settings'):
-
-            for rep in self.repositories():
-                debugging('\nCONVERT-TO-SSH ' + rep)
-                dire = self.expand_path(rep)
-                if self.is_git_repository(dire):
-                    remote = Git(rep, 'remote', '-v')
-                    changed = [] # avoid duplicates by keeping a list of remotes that have already been changed
-                    if remote:
-                        if 'https://' in remote.output:
-                            # remotes will be repeating triples that look something like:
-                            # 'origin', 'https://AndrewsBucket@bitbucket.org/AndrewsBucket/webquiz.git', '(fetch)'
-                            remotes = remote.output.split()
-                            r=0
-                            while r+1<len(remotes):
-                                https = remotes[r+1] # a https string as above
-                                if remotes[r] not in changed and '@' in https:
-                                    ssh = 'git'+https[https.index('@'):].replace('/',':',1)
-                                    changing = Git(rep, 'remote', f'set-url {remotes[r]} {ssh}')
-                                    if changing:
-                                        self.rep_message(rep, 'changed to ssh access')
-                                        changed.append(remotes[r])
-                                r += 3
-                        else:
-                            self.rep_message(rep, 'unchanged')
+        self.catalogue_command(self.remote_set_ssh_repository)
+
+    def remote_set_ssh_repository(self, rep):
+        r'''
+        Change the remote URLs of the repository `rep` to use ssh access
+        '''
+        debugging('\nCONVERT-TO-SSH ' + rep)
+        dire = self.catalogue[rep].path
+        if self.is_git_repository(dire):
+            remote = Git(rep, 'remote', ['-v'], cwd=dire)
+            changed = [] # avoid duplicates by keeping a list of remotes that have already been changed
+            if remote:
+                if 'https://' in remote.output:
+                    # remotes will be repeating triples that look something like:
+                    # 'origin', 'https://AndrewsBucket@bitbucket.org/AndrewsBucket/webquiz.git', '(fetch)'
+                    remotes = remote.output.split()
+                    r=0
+                    while r+1<len(remotes):
+                        https = remotes[r+1] # a https string as above
+                        if remotes[r] not in changed and '@' in https:
+                            ssh = 'git'+https[https.index('@'):].replace('/',':',1)
+                            changing = Git(rep, 'remote', ['set-url', remotes[r], ssh], cwd=dire)
+                            if changing:
+                                self.rep_message(rep, 'changed to ssh access')
+                                changed.append(remotes[r])
+                        r += 3
                 else:
-                    self.rep_message(rep, 'not on system')
+                    self.rep_message(rep, 'unchanged')
+        else:
+            self.rep_message(rep, 'not on system')
 
     def rm(self):
         r'''
@@ -1142,13 +3057,13 @@ class GitCat:
             git cat remove  # remove the current directory to the catalogue
 
         '''
-        dire = self.get_current_git_root()
-        rep = Git(dire, 'remote', 'get-url --push origin')
+        root = self.get_current_git_root()
+        dire = self.short_path(root)
+        rep = Git(dire, 'remote', ['get-url', '--push', 'origin'], cwd=root)
 
         if not rep:
             error_message(f'Unable to find remote repository for {dire}')
 
-        dire = self.short_path(dire.output.strip())
         if dire not in self.catalogue:
             error_message(f'unknown repository {dire}')
 
@@ -1159,13 +3074,14 @@ class GitCat:
         if self.options.git_everything:
             # remove directory
             self.message(f'Removing directory {dire}')
-            shutil.rmtree(dire)
+            import shutil
+            shutil.rmtree(self.expand_path(dire))
 
             # check to see if the gitcatrc is in a git repository and, if so,
             # add a commit message
             catdir = os.path.dirname(self.gitcatrc)
             if self.is_git_repository(catdir):
-                Git(dire, 'commit', '--all --message "{}"'.format(f'Removing {dire} from gitcatrc'))
+                Git(dire, 'commit', ['--all', f'--message=Removing {dire} from gitcatrc'], cwd=catdir)
 
     def status(self):
         r'''
@@ -1186,56 +3102,397 @@ class GitCat:
               M git-options.ini
               M gitcat.py
         '''
-        if self.connected_to_internet('check status'):
-
-            status_options = self.process_options('--porcelain --short --branch')
-            diff_options = '--shortstat --no-color'
-
-            for rep in self.repositories():
-                debugging(f'\nSTATUS for {rep}')
-                dire = self.expand_path(rep)
-                if self.is_git_repository(dire):
-
-                    # update with remote, unless local is true
-                    remote = self.options.git_local or Git(rep, 'remote', 'update')
-
-                    if remote:
-                        # use status to work out relative changes
-                        status = Git(rep, 'status', status_options)
-                        if status:
-                            changes = ahead_behind.search(status.output)
-                            changes = '' if changes is None else changes.group()[1:-1]
-
-                            if '\n' in status.output:
-                                status.output = status.output[status.output.
-                                                              index('\n') + 1:]
-                            elif status.output.startswith('  ##'):
-                                status.output = ''
-
-                            # use diff to work out which files have changed
-                            diff = Git(rep, 'diff', diff_options)
-                            changed = ''
-                            if diff:
-                                changed = files_changed.search(diff.output)
-                                changed = '' if changed is None else 'uncommitted changes in ' + changed.groups()[0]
-
-                            debugging(f'changes = {changes}\nchanged={changed}\nstatus={status.output}')
-
-                            if changes != '':
-                                changed += changes if changed == '' else ', ' + changes
-
-                            if status.output != '':
-                                self.rep_message(
-                                    rep,
-                                    changed + '\n' + status.output,
-                                    quiet=False)
-                            elif changed != '':
-                                self.rep_message(rep, changed, quiet=False)
-                            else:
-                                self.rep_message(rep, 'up to date')
+        status_options = self.process_options(['--porcelain=v2', '--branch'], exclude=['git_fast', 'git_local'])
 
-                else:
-                    self.rep_message(rep, 'not on system')
+        # with --fast, the last status of each repository is cached together
+        # with its fingerprint and reused if the fingerprint has not changed
+        self.status_cache = {}
+        cache_file = os.path.join(settings.cache_dir, 'status.pickle')
+        if self.options.git_fast:
+            self.status_cache = load_cache(cache_file, status_options) or {}
+
+        self.catalogue_command(self.status_repository, status_options,
+                               network=None if self.options.git_local else 'check status')
+
+        if self.options.git_fast:
+            save_cache(cache_file, status_options, self.status_cache)
+
+    def status_repository(self, rep, status_options):
+        r'''
+        Print a summary of the status of the repository `rep`, which is
+        obtained from a single `git status --porcelain=v2 --branch` call.
+        With --fast, the status is not recomputed if the fingerprint of the
+        repository is unchanged since the last time that it was computed and
+        the files in the index match the working tree.
+        '''
+        debugging(f'\nSTATUS for {rep}')
+        dire = self.catalogue[rep].path
+        if self.is_git_repository(dire):
+
+            # update with remote, unless local is true
+            remote = self.options.git_local or Git(rep, 'remote', ['update'], cwd=dire)
+
+            if remote:
+                if self.options.git_fast:
+                    # FETCH_HEAD is rewritten by every remote update, so it is
+                    # only part of the fingerprint when the status is local
+                    key = fingerprint(dire, fetch_head=self.options.git_local)
+                    cached = self.status_cache.get(dire)
+                    if (cached is not None and cached[0] == key
+                            and index_matches_work_tree(dire, git_directory(dire))):
+                        debugging(f'using cached status for {rep}')
+                        record(**cached[3])
+                        self.rep_message(rep, cached[1], quiet=cached[2])
+                        return
+
+                status = Git(rep, 'status', status_options, cwd=dire)
+                if status:
+                    status = GitStatus(status.stdout)
+                    debugging(f'status = {status}')
+                    counts = {slot: getattr(status, slot) for slot in ('ahead', 'behind', 'staged', 'unstaged', 'untracked')}
+                    record(**counts)
+
+                    changed = ''
+                    if status.unstaged > 0:
+                        changed = 'uncommitted changes in {} file{}'.format(
+                            status.unstaged, '' if status.unstaged == 1 else 's')
+
+                    changes = status.changes()
+                    if changes != '':
+                        changed += changes if changed == '' else ', ' + changes
+
+                    if status.files != []:
+                        message = changed + '\n' + '\n'.join('  ' + lin.strip() for lin in status.files)
+                    else:
+                        message = changed if changed != '' else 'up to date'
+                    quiet = message == 'up to date'
+                    self.rep_message(rep, message, quiet=quiet)
+
+                    if self.options.git_fast:
+                        self.status_cache[dire] = (key, message, quiet, counts)
+
+        else:
+            self.rep_message(rep, 'not on system')
+
+    def tune(self):
+        r'''
+        Audit the git settings that speed up `git status` in large
+        repositories, which are the untracked cache, the split index, the
+        many files feature and, if git supports it on this platform, the
+        builtin file system monitor. For each repository, the time taken
+        by `git status` is printed together with the settings that are not
+        enabled. With --enable, these settings are enabled and the time
+        taken by `git status` is printed before and after.
+
+        The repositories are timed one at a time so that the timings are not
+        distorted by running git in several repositories at once.
+
+        Example:
+            > git cat tune --enable Code
+            Code/Project1  status 0.012s, all speedups enabled
+            Code/Project2  status 2.104s -> 0.187s, enabled core.untrackedCache, feature.manyFiles, core.splitIndex
+        '''
+        speedups = ['core.untrackedCache', 'feature.manyFiles', 'core.splitIndex']
+        build = Git('', 'version', ['--build-options'])
+        if 'fsmonitor--daemon' in build.stdout:
+            speedups.append('core.fsmonitor')
+        self.jobs = 1
+        self.catalogue_command(self.tune_repository, speedups)
+
+    def status_time(self, rep, dire):
+        r'''
+        Return the number of seconds taken by `git status` in the repository
+        `rep`, or `None` if `git status` fails.
+        '''
+        start = time.perf_counter()
+        status = Git(rep, 'status', ['--porcelain'], cwd=dire)
+        return time.perf_counter() - start if status else None
+
+    def tune_repository(self, rep, speedups):
+        r'''
+        Time `git status` in the repository `rep` and, with --enable, turn on
+        the settings in `speedups` that are not already enabled.
+        '''
+        debugging(f'\nTUNE {rep}')
+        dire = self.catalogue[rep].path
+        if not self.is_git_repository(dire):
+            self.rep_message(rep, 'not on system')
+            return
+
+        before = self.status_time(rep, dire)
+        if before is None:
+            self.rep_message(rep, 'git status failed', quiet=False)
+            return
+
+        # the names of the settings are lower case in the output of git config
+        # and, as for git config --get, the last value of each setting wins
+        config = Git(rep, 'config', ['--list'], cwd=dire)
+        values = dict(line.partition('=')[::2] for line in config.stdout.splitlines())
+        enabled = {key for key, val in values.items() if val.lower() not in ('', 'false', 'no', 'off', '0')}
+        if 'feature.manyfiles' in enabled and 'core.untrackedcache' not in values:
+            # feature.manyFiles turns on the untracked cache unless it is set
+            enabled.add('core.untrackedcache')
+        missing = [speedup for speedup in speedups if speedup.lower() not in enabled]
+        if missing == []:
+            self.rep_message(rep, f'status {before:.3f}s, all speedups enabled')
+        elif not self.options.git_enable:
+            self.rep_message(rep, f'status {before:.3f}s, not enabled {", ".join(missing)}', quiet=False)
+        else:
+            for speedup in missing:
+                if not Git(rep, 'config', [speedup, 'true'], cwd=dire):
+                    return
+
+            # rewrite the index using the new settings and then run git status
+            # once to populate the caches before timing it again
+            index_options = ['--untracked-cache', '--split-index']
+            if 'feature.manyFiles' in missing:
+                index_options += ['--index-version', '4']
+            if Git(rep, 'update-index', index_options, cwd=dire) and self.status_time(rep, dire) is not None:
+                after = self.status_time(rep, dire)
+                self.rep_message(rep, f'status {before:.3f}s -> {after:.3f}s, enabled {", ".join(missing)}', quiet=False)
+
+    # the commands that the daemon answers
+    daemon_commands = ('branch', 'ls', 'status')
+
+    def daemon(self):
+        r'''
+        Start the git cat daemon, which keeps running until it is stopped with
+        `git cat daemon --stop`, or interrupted. The daemon uses inotify to
+        watch the git directory and the working tree of each repository in
+        the catalogue, and it remembers the output of `git cat branch`,
+        `git cat ls` and `git cat status --local` for each repository until
+        the repository changes. While the daemon is running, these commands
+        are answered by the daemon over a Unix socket in the cache directory.
+        All other commands, and `git cat status` without --local, are run
+        directly, as they are when the daemon is not running. The catalogue
+        is reread whenever the gitcatrc file changes. The daemon needs linux.
+
+        Example:
+            > git cat daemon &
+            > git cat status --local
+            > git cat daemon --stop
+        '''
+        import select
+        import socket
+
+        path = daemon_socket()
+        running = query_daemon(dict(ping=True))
+        if self.options.git_stop:
+            if running is None:
+                error_message('the git cat daemon is not running')
+            query_daemon(dict(stop=True))
+            self.message('git cat daemon stopped')
+            return
+        if running is not None:
+            error_message(f'the git cat daemon is already running on {path}')
+
+        # git must not update the index opportunistically, as this would look
+        # like a change to the repository
+        os.environ['GIT_OPTIONAL_LOCKS'] = '0'
+        Git.deadline = None  # the daemon runs until it is stopped
+        try:
+            inotify = self.watch_catalogue()
+        except OSError as err:
+            error_message(f'unable to start the daemon: {err}')
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)  # left behind by a daemon that was killed
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(path)
+            os.chmod(path, 0o600)
+            server.listen()
+            self.message(f'git cat daemon watching {len(self.memo)} repositories')
+            sys.stdout.flush()
+            serving = True
+            while serving:
+                ready, _, _ = select.select([server, inotify], [], [])
+                if inotify in ready:
+                    inotify = self.daemon_events(inotify)
+                if server in ready:
+                    connection, _ = server.accept()
+                    # a client that is stuck must not hang the daemon
+                    connection.settimeout(5)
+                    with connection:
+                        inotify = self.daemon_events(inotify)
+                        serving = self.daemon_request(connection)
+        finally:
+            server.close()
+            os.remove(path)
+            inotify.close()
+
+    def watch_catalogue(self):
+        r'''
+        Return an `Inotify` that watches the gitcatrc file and the
+        repositories in the catalogue, and reset `self.memo`. The outputs
+        for repositories that cannot be watched are never remembered. The
+        repositories that are not installed are watched until they are.
+        '''
+        git_root.cache_clear()
+        inotify = Inotify()
+        inotify.watch(os.path.dirname(os.path.abspath(self.gitcatrc)), None)
+        self.memo = {}
+        self.missing = set()
+        for rep in self.catalogue:
+            try:
+                self.watch_missing(inotify, rep)
+            except OSError as err:
+                debugging(f'unable to watch {rep}: {err}')
+        return inotify
+
+    def watch_missing(self, inotify, rep):
+        r'''
+        Use `inotify` to watch the repository `rep` if it is a git
+        repository. Otherwise, watch its directory, or the nearest parent
+        directory that exists, and its `.git` directory, if this exists, so
+        that the daemon notices when the repository is installed.
+        '''
+        dire = self.catalogue[rep].path
+        if rep not in self.missing:
+            if self.is_git_repository(dire):
+                self.watch_repository(inotify, rep, dire)
+                self.memo[rep] = {}
+                return
+            self.missing.add(rep)
+
+        directory = dire
+        while not os.path.isdir(directory) and os.path.dirname(directory) != directory:
+            directory = os.path.dirname(directory)
+        inotify.watch(directory, rep)
+        if os.path.isdir(os.path.join(dire, '.git')):
+            inotify.watch(os.path.join(dire, '.git'), rep)
+
+        # check again, as the repository may have been installed while the
+        # directories were being watched
+        git_root.cache_clear()
+        if self.is_git_repository(dire):
+            self.missing.discard(rep)
+            self.watch_repository(inotify, rep, dire)
+            self.memo[rep] = {}
+
+    def watch_repository(self, inotify, rep, dire):
+        r'''
+        Use `inotify` to watch the working tree in `dire`, the git directory
+        and the refs of the repository `rep`. The objects are not watched
+        as they only change when the refs change.
+        '''
+        git_dir = git_directory(dire)
+        common_dir = common_directory(git_dir)
+        directories = [git_dir] if common_dir == git_dir else [git_dir, common_dir]
+        for root, subdirs, _ in os.walk(os.path.join(common_dir, 'refs')):
+            directories.append(root)
+        for root, subdirs, _ in os.walk(dire):
+            subdirs[:] = [subdir for subdir in subdirs if subdir != '.git']
+            directories.append(root)
+        for directory in directories:
+            inotify.watch(directory, rep)
+
+    def daemon_events(self, inotify):
+        r'''
+        Forget the remembered output of the repositories that have changed
+        and watch any new directories in them. If the gitcatrc file has
+        changed then reread the catalogue and return a new `Inotify` for it,
+        and otherwise return `inotify`.
+        '''
+        events = inotify.read()
+        if events:
+            # directories may have become, or stopped being, git repositories
+            git_root.cache_clear()
+        for rep, path, name, mask in events:
+            if mask & Inotify.IN_Q_OVERFLOW:
+                # events were lost, so forget everything
+                for memo in self.memo.values():
+                    memo.clear()
+            elif rep is None:
+                if name == os.path.basename(self.gitcatrc):
+                    self.message('rereading the catalogue')
+                    inotify.close()
+                    self.read_catalogue()
+                    return self.watch_catalogue()
+            elif rep in self.missing:
+                try:
+                    self.watch_missing(inotify, rep)
+                except OSError as err:
+                    debugging(f'unable to watch {rep}: {err}')
+            elif rep in self.memo:
+                self.memo[rep].clear()
+                if mask & Inotify.IN_ISDIR and mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                    try:
+                        for root, subdirs, _ in os.walk(os.path.join(path, name)):
+                            subdirs[:] = [subdir for subdir in subdirs if subdir != '.git']
+                            inotify.watch(root, rep)
+                    except OSError:
+                        del self.memo[rep]
+        return inotify
+
+    def daemon_request(self, connection):
+        r'''
+        Answer a request from `connection` and return `False` if the daemon
+        should stop. The request is a JSON dictionary that either asks the
+        daemon to stop or gives the command line arguments of git cat. The
+        reply is a JSON dictionary that gives the output of the command or,
+        if the daemon cannot answer the request, that asks for it to be run
+        directly. Connections that are closed, or that time out, before
+        sending a request are dropped and requests that cannot be read are
+        answered with a fallback.
+        '''
+        import contextlib
+        import io
+        import json
+
+        try:
+            request = b''
+            while not request.endswith(b'\n'):
+                data = connection.recv(65536)
+                if data == b'':
+                    return True
+                request += data
+            request = json.loads(request)
+            if not isinstance(request, dict):
+                raise ValueError('the request is not a dictionary')
+        except OSError as err:
+            debugging(f'dropping daemon connection: {err}')
+            return True
+        except ValueError as err:
+            debugging(f'bad daemon request: {err}')
+            request = {}
+
+        reply = dict(fallback=True)
+        if request.get('stop'):
+            reply = dict(stopped=True)
+        elif request.get('ping'):
+            reply = dict(running=True)
+        elif 'argv' in request:
+            try:
+                parser, commands = setup_command_line_parser(settings, request['argv'])
+                with contextlib.redirect_stderr(io.StringIO()):
+                    options = parser.parse_args(request['argv'])
+                options.defaults = option_defaults(parser, commands, options)
+            except SystemExit:
+                options = None
+
+            command = None if options is None else settings.command_alias.get(options.command, options.command)
+            if (command in self.daemon_commands
+                    and (command != 'status' or options.git_local)
+                    and os.path.abspath(options.catalogue) == os.path.abspath(self.gitcatrc)
+                    and self.rc_settings.get('prefix', options.prefix) == self.prefix
+                    and options.moveto is None):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    self.set_options(options)
+                    self.set_max()
+                    try:
+                        getattr(self, command)()
+                    except SystemExit:
+                        pass
+                reply = dict(output=output.getvalue())
+
+        try:
+            connection.sendall(json.dumps(reply).encode())
+        except OSError as err:
+            debugging(f'unable to reply to the daemon request: {err}')
+        return not request.get('stop')
 
 
 # ---------------------------------------------------------------------------
@@ -1258,6 +3515,7 @@ class GitCatHelpFormatter(argparse.HelpFormatter):
                 for choice in action.choices[i:i+self.ChoicesPerLine]:
                     current.append('%-40s' % choice)
                 msg.append(' | '.join(current))
+            from difflib import get_close_matches
             possible = get_close_matches(value, action.choices, cutoff=0.8)
             if possible:
                 extra = ['\n\nInvalid choice: %r, maybe you meant:\n' % value]
@@ -1334,11 +3592,50 @@ class GitCatHelpFormatter(argparse.HelpFormatter):
 
 
 # ---------------------------------------------------------------------------
-def setup_command_line_parser(settings):
+class GitCatCommandParser(argparse.ArgumentParser):
+    '''
+    The parser for a `git cat` command. The epilog of the help message is the
+    doc-string of the corresponding method of `GitCat`, which is only
+    formatted when the help message is needed.
+    '''
+    def __init__(self, *args, command=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.command = command
+
+    def format_help(self):
+        if self.epilog is None and self.command is not None:
+            self.epilog = Settings.doc_string(self.command)
+        return super().format_help()
+
+
+def requested_command(parser, args):
+    '''
+    Return the `git cat` command in the command line arguments `args`, or
+    `None` if there is no command or help has been requested. The options of
+    `parser` are used to skip over the values of the options before the
+    command.
+    '''
+    args = iter(args)
+    for arg in args:
+        if arg.startswith('-'):
+            action = parser._option_string_actions.get(arg.split('=')[0])
+            if action is not None and action.dest == 'help':
+                return None
+            if action is not None and action.nargs != 0 and '=' not in arg:
+                next(args, None)
+        else:
+            return arg
+    return None
+
+
+def setup_command_line_parser(settings, args=None):
     '''
     Return parsers for the command line options and the commands.
     The function is used to parse the command-line options an to
     automatically generate the documentation from setup.py
+
+    If the command line arguments `args` are given then only the parser for
+    the command in `args` is constructed, unless this command is not known.
     '''
     # set parse the command line options using argparse
     parser = argparse.ArgumentParser(
@@ -1363,6 +3660,41 @@ def setup_command_line_parser(settings):
         type=str,
         default=settings.prefix,
         help='Prefix directory name containing all repositories')
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=settings.jobs,
+        help=f'Number of repositories to process concurrently (default: {settings.jobs})')
+    parser.add_argument(
+        '-o',
+        '--output',
+        choices=['text', 'ndjson'],
+        default='text',
+        help='Print text or, with ndjson, one JSON object for each repository')
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help='Kill any git command that runs for more than SECONDS')
+    parser.add_argument(
+        '--deadline',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help='Stop running git commands SECONDS after git cat starts')
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        default=False,
+        help='Print the slowest repositories and git commands at the end')
+    parser.add_argument(
+        '--trace',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='Save the timings of the git commands in FILE in the Chrome trace format')
     parser.add_argument(
         '-q',
         '--quiet',
@@ -1409,20 +3741,50 @@ def setup_command_line_parser(settings):
     commands = parser.add_subparsers(
         title='Commands',
         help='Subcommand to run',
-        dest='command')
-    settings.add_git_options(commands)
+        dest='command',
+        parser_class=GitCatCommandParser)
+    command = None if args is None else requested_command(parser, args)
+    if command not in settings.commands:
+        command = settings.command_alias.get(command)
+    settings.add_git_options(commands, command)
     parser._optionals.title = 'Optional arguments'
     return parser, commands
 
+def option_defaults(parser, commands, options):
+    r'''
+    Return a dictionary of the default values, from the parsers `parser` and
+    `commands`, of the command line options in `options`
+    '''
+    command_parser = commands.choices.get(options.command)
+    defaults = {}
+    for key in vars(options):
+        defaults[key] = parser.get_default(key)
+        if defaults[key] is None and command_parser is not None:
+            defaults[key] = command_parser.get_default(key)
+    return defaults
+
 def main():
     r'''
     Parse command line options and then run git cat
     '''
-    parser, commands = setup_command_line_parser(settings)
-    if argcomplete:
-        argcomplete.autocomplete(parser)
+    settings = load_settings()
+    signal.signal(signal.SIGINT, graceful_exit)
+    signal.signal(signal.SIGTERM, graceful_exit)
+
+    # argcomplete is only needed, and needs the parsers for all of the
+    # commands, when completing the command line
+    if '_ARGCOMPLETE' in os.environ:
+        parser, commands = setup_command_line_parser(settings)
+        try:
+            import argcomplete
+            argcomplete.autocomplete(parser)
+        except ImportError:
+            pass
+    else:
+        parser, commands = setup_command_line_parser(settings, sys.argv[1:])
     options = parser.parse_args()
-    settings.DEBUGGING = options.debugging
+    options.defaults = option_defaults(parser, commands, options)
+    Settings.DEBUGGING = options.debugging
 
     if options.help > 0:
         parser.print_help()
@@ -1444,7 +3806,24 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    GitCat(options, settings)
+    # the daemon answers some commands, if it is running
+    if (settings.command_alias.get(options.command, options.command) in GitCat.daemon_commands
+            and options.moveto is None and options.trace is None and not options.timings):
+        reply = query_daemon(dict(argv=sys.argv[1:]))
+        if reply is not None and 'output' in reply:
+            sys.stdout.write(reply['output'])
+            return
+
+    if options.trace is not None or options.timings:
+        Git.calls = []
+    try:
+        GitCat(options, settings)
+    finally:
+        if Git.calls is not None:
+            if options.trace is not None:
+                write_trace(Git.calls, options.trace)
+            if options.timings:
+                print_timings(Git.calls)
 
 # ---------------------------------------------------------------------------
 if __name__ == '__main__':
@@ -0,0 +1,88 @@
+r'''
+Fixtures for the git cat tests, which run git cat in a temporary home
+directory whose catalogue repositories have local bare repositories as their
+remotes, so that nothing needs the network.
+'''
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+GITCAT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GITCAT)
+
+# run the git-cat entry point in the same way as the console script
+ENTRY_POINT = 'import sys; sys.argv[0] = "git-cat"; from gitcat import main; main()'
+
+
+class Home:
+    r'''
+    A temporary home directory for git cat, with a catalogue in ~/.gitcatrc
+    '''
+    def __init__(self, path):
+        self.path = str(path)
+        self.env = dict(os.environ, HOME=self.path, PYTHONPATH=GITCAT,
+                        GIT_CONFIG_NOSYSTEM='1')
+        self.env.pop('XDG_CONFIG_HOME', None)
+        self.env.pop('XDG_CACHE_HOME', None)
+        with open(os.path.join(self.path, '.gitconfig'), 'w') as gitconfig:
+            gitconfig.write('[user]\n\tname = Git Cat\n\temail = git@cat\n'
+                            '[init]\n\tdefaultBranch = master\n')
+        self.settings = []
+        self.repositories = []
+
+    def git(self, *args, cwd=None):
+        r'''
+        Run the git command `args` in the directory `cwd`, which defaults to
+        the home directory
+        '''
+        subprocess.run(['git', *args], cwd=cwd or self.path, env=self.env,
+                       check=True, capture_output=True)
+
+    def add_repository(self, name):
+        r'''
+        Add the repository ~/Code/`name` to the catalogue and return its path
+        '''
+        remote = os.path.join(self.path, 'remotes', name + '.git')
+        dire = os.path.join(self.path, 'Code', name)
+        os.makedirs(os.path.dirname(dire), exist_ok=True)
+        self.git('init', '--quiet', '--bare', remote)
+        self.git('clone', '--quiet', remote, dire)
+        with open(os.path.join(dire, 'README'), 'w') as readme:
+            readme.write(name + '\n')
+        self.git('add', 'README', cwd=dire)
+        self.git('commit', '--quiet', '--message=initial', cwd=dire)
+        self.git('push', '--quiet', 'origin', 'master', cwd=dire)
+        self.repositories.append((f'Code/{name}', remote))
+        self.write_gitcatrc()
+        return dire
+
+    def write_gitcatrc(self):
+        r'''
+        Write ~/.gitcatrc, with the settings and the catalogue
+        '''
+        with open(os.path.join(self.path, '.gitcatrc'), 'w') as gitcatrc:
+            for setting in self.settings:
+                gitcatrc.write(setting + '\n')
+            gitcatrc.write('Catalogue:\n')
+            for rep, remote in self.repositories:
+                gitcatrc.write(f'{rep} = {remote}\n')
+
+    def git_cat(self, *args, timeout=60):
+        r'''
+        Run git cat with the command line arguments `args` and return the
+        completed process
+        '''
+        return subprocess.run([sys.executable, '-c', ENTRY_POINT, *args],
+                              cwd=self.path, env=self.env, capture_output=True,
+                              text=True, timeout=timeout)
+
+
+@pytest.fixture
+def home(tmp_path):
+    r'''
+    Return a temporary home directory for git cat
+    '''
+    return Home(tmp_path)
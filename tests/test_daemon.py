@@ -0,0 +1,75 @@
+r'''
+Tests for the git cat daemon
+'''
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import ENTRY_POINT
+
+
+@pytest.fixture
+def daemon(home):
+    r'''
+    Start the git cat daemon in `home` and return the path of its socket
+    '''
+    home.add_repository('watched')
+    path = os.path.join(home.path, '.cache', 'gitcat', 'daemon.sock')
+    process = subprocess.Popen([sys.executable, '-c', ENTRY_POINT, 'daemon'],
+                               cwd=home.path, env=home.env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    start = time.monotonic()
+    while request(path, b'{"ping": true}\n') is None:
+        assert process.poll() is None, 'the daemon did not start'
+        assert time.monotonic() - start < 30, 'the daemon did not start'
+        time.sleep(0.1)
+    yield path
+    request(path, b'{"stop": true}\n')
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def request(path, data, timeout=20):
+    r'''
+    Send the bytes `data` to the daemon listening on `path` and return its
+    reply, or `None` if the daemon cannot be reached
+    '''
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(path)
+            client.sendall(data)
+            return json.loads(b''.join(iter(lambda: client.recv(65536), b'')))
+    except (OSError, ValueError):
+        return None
+
+
+def test_silent_client_is_dropped(daemon):
+    r'''
+    A client that connects but never sends a request must not stop the
+    daemon from answering other clients
+    '''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+        silent.connect(daemon)
+        assert request(daemon, b'{"ping": true}\n') == dict(running=True)
+    assert request(daemon, b'{"ping": true}\n') == dict(running=True)
+
+
+def test_garbage_request_falls_back(daemon):
+    r'''
+    A request that is not a JSON dictionary is answered with a fallback and
+    the daemon keeps running
+    '''
+    assert request(daemon, b'this is not json\n') == dict(fallback=True)
+    assert request(daemon, b'[1, 2, 3]\n') == dict(fallback=True)
+    assert request(daemon, b'\xff\xfe\n') == dict(fallback=True)
+    assert request(daemon, b'{"ping": true}\n') == dict(running=True)
@@ -0,0 +1,33 @@
+r'''
+Tests for finding the servers of the remote repositories
+'''
+
+import pytest
+
+from gitcat import remote_address, remote_host
+
+
+@pytest.mark.parametrize('url, address', [
+    ('git@github.com:AndrewAtLarge/gitcat.git', ('ssh', 'git@github.com', None)),
+    ('ssh://git@example.com:2222/repo.git', ('ssh', 'git@example.com', 2222)),
+    ('https://github.com/AndrewAtLarge/gitcat.git', ('https', 'github.com', 443)),
+    ('/home/me/repo.git', None),
+    ('C:/Users/me/repo.git', None),
+])
+def test_remote_address(url, address):
+    r''' The server, if any, that git connects to for each remote URL '''
+    assert remote_address(url) == address
+
+
+@pytest.mark.parametrize('url', [
+    'ext::ssh -p 2222 example.com %S repo.git',
+    'persistent-https::https://example.com/repo.git',
+    'hg::https://example.com/repo',
+])
+def test_remote_helper_urls_are_not_ssh(url):
+    r'''
+    Remote helper URLs of the form transport::address are not scp-like ssh
+    URLs, as git passes them to the remote helper git-remote-transport
+    '''
+    assert remote_host(url) is None
+    assert remote_address(url) is None
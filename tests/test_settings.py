@@ -0,0 +1,42 @@
+r'''
+Tests for the settings in the gitcatrc file
+'''
+
+import json
+import os
+
+
+def test_command_line_timeout_beats_gitcatrc(home):
+    r'''
+    The --timeout option takes precedence over the timeout in the gitcatrc
+    file
+    '''
+    dire = home.add_repository('slow')
+    hook = os.path.join(dire, '.git', 'hooks', 'pre-commit')
+    with open(hook, 'w') as pre_commit:
+        pre_commit.write('#!/bin/sh\nsleep 5\n')
+    os.chmod(hook, 0o755)
+    with open(os.path.join(dire, 'README'), 'a') as readme:
+        readme.write('changed\n')
+    home.settings.append('timeout = 60')
+    home.write_gitcatrc()
+
+    git_cat = home.git_cat('--timeout', '1', 'commit')
+    assert 'timed out after 1.0 seconds' in git_cat.stdout
+
+
+def test_command_line_jobs_beats_gitcatrc(home):
+    r'''
+    The --jobs option takes precedence over the jobs in the gitcatrc file, so
+    with `--jobs 1` every git command is run by the same thread
+    '''
+    for name in ['one', 'two', 'three', 'four']:
+        home.add_repository(name)
+    home.settings.append('jobs = 4')
+    home.write_gitcatrc()
+
+    trace = os.path.join(home.path, 'trace.json')
+    home.git_cat('--jobs', '1', '--trace', trace, 'status')
+    with open(trace) as events:
+        threads = {event['tid'] for event in json.load(events)['traceEvents']}
+    assert len(threads) == 1
@@ -0,0 +1,25 @@
+r'''
+Tests for the --timeout and --deadline options
+'''
+
+import os
+import time
+
+
+def test_timed_out_commit_removes_index_lock(home):
+    r'''
+    A commit that is stopped by --timeout, here because its pre-commit hook
+    hangs, must not leave .git/index.lock behind
+    '''
+    dire = home.add_repository('hangs')
+    hook = os.path.join(dire, '.git', 'hooks', 'pre-commit')
+    with open(hook, 'w') as pre_commit:
+        pre_commit.write('#!/bin/sh\nsleep 60\n')
+    os.chmod(hook, 0o755)
+    with open(os.path.join(dire, 'README'), 'a') as readme:
+        readme.write('changed\n')
+
+    start = time.monotonic()
+    home.git_cat('--timeout', '1', 'commit')
+    assert time.monotonic() - start < 30
+    assert not os.path.exists(os.path.join(dire, '.git', 'index.lock'))